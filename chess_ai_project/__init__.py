@@ -0,0 +1,11 @@
+# The engine is imported on first attribute access rather than with the
+# package, so that "python -m chess_ai_project.<tool>" runs each tool's module
+# fresh instead of one the package has already loaded.
+__all__ = ["Engine", "SearchLimits", "SearchResult"]
+
+
+def __getattr__(name):
+    if name in __all__:
+        from . import engine
+        return getattr(engine, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
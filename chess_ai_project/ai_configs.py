@@ -0,0 +1,38 @@
+from .minimax import (minimax, minimax_no_ab, simple_heuristic_ai, pure_symmetry_reduction_ai, evaluate_board_material,
+                     evaluate_board_pst, evaluate_board_combined)
+
+# There are no symmetry-reduction entries. Dropping mirrored moves is only
+# sound in a position that is its own left-right mirror, which needs both
+# kings gone, so in a real game reduce_symmetry never removes a move and
+# those entries played exactly like their unreduced versions. The
+# "pure_symmetry" algorithm and the symmetry flag remain for callers that
+# search king-less positions. Sharing transposition-table entries between
+# mirrored positions is likewise limited to the material heuristic, because
+# the queen piece-square table is not left-right symmetric.
+MENU_OPTIONS = [
+    ("Minimax (No Alpha-Beta, Material)", {"algorithm": "minimax_no_ab", "heuristic": "material", "symmetry": False}),
+    ("Minimax with Alpha-Beta (Material)", {"algorithm": "minimax_ab", "heuristic": "material", "symmetry": False}),
+    ("Heuristic (Material Balance)", {"algorithm": "greedy", "heuristic": "material", "symmetry": False}),
+    ("Heuristic (Piece-Square Tables)", {"algorithm": "greedy", "heuristic": "pst", "symmetry": False}),
+    ("Minimax (Alpha-Beta, PST)", {"algorithm": "minimax_ab", "heuristic": "pst", "symmetry": False}),
+    ("Minimax (Alpha-Beta, Combined Heuristics)", {"algorithm": "minimax_ab", "heuristic": "combined", "symmetry": False}),
+]
+
+ALGORITHMS = {
+    "minimax_ab": minimax,
+    "minimax_no_ab": minimax_no_ab,
+    "greedy": simple_heuristic_ai,
+    "pure_symmetry": pure_symmetry_reduction_ai,
+}
+
+HEURISTICS = {
+    "material": evaluate_board_material,
+    "pst": evaluate_board_pst,
+    "combined": evaluate_board_combined,
+}
+
+
+def resolve_config(params):
+    algorithm_func = ALGORITHMS.get(params.get("algorithm"), minimax)
+    evaluate_func = HEURISTICS.get(params.get("heuristic"))
+    return algorithm_func, evaluate_func, params.get("symmetry", False)
@@ -0,0 +1,135 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+from .board import is_valid_move, make_move
+from .bitboard import from_board, decode_move
+from .minimax import minimax, minimax_no_ab, iterative_deepening, simple_heuristic_ai, pure_symmetry_reduction_ai, SearchControl
+
+
+def run_ai_search(board, player, algorithm_func, evaluate_func, use_symmetry, tt, control, book=None, tablebase=None,
+                  stats=None):
+    # Returns the move, the time taken, the depth searched and where the
+    # move came from when it was not searched ("book" or "tablebase").
+    # stats, a SearchStats, is filled in only by the minimax searches.
+    start_time = time.perf_counter()
+    depth = 0
+
+    if book is not None and algorithm_func in (minimax, minimax_no_ab):
+        move = book.choose_move(board, player)
+        if move is not None:
+            return move, time.perf_counter() - start_time, depth, "book"
+
+    if tablebase is not None and algorithm_func in (minimax, minimax_no_ab):
+        pos = from_board(board)
+        if pos.occupied.bit_count() <= tablebase.max_pieces:
+            result = tablebase.best_move(pos, player)
+            if result is not None:
+                return decode_move(result[1]), time.perf_counter() - start_time, depth, "tablebase"
+
+    if algorithm_func == minimax:
+        _, move, depth = iterative_deepening(board, player, evaluate_func, use_symmetry, tt=tt, control=control,
+                                             tablebase=tablebase, stats=stats)
+    elif algorithm_func == minimax_no_ab:
+        _, move, depth = iterative_deepening(board, player, evaluate_func, use_symmetry, alpha_beta=False, control=control,
+                                             stats=stats)
+    elif algorithm_func == simple_heuristic_ai:
+        move = simple_heuristic_ai(board, player, evaluate_func, use_symmetry)
+    elif algorithm_func == pure_symmetry_reduction_ai:
+        move = pure_symmetry_reduction_ai(board, player, use_symmetry=use_symmetry)
+    else:
+        move = None
+
+    return move, time.perf_counter() - start_time, depth, None
+
+
+class AISearchWorker:
+    def __init__(self):
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="ai-search")
+        self.future = None
+        self.control = None
+        self.stats = None
+        # The reply the last search expects, taken from its principal
+        # variation, and while pondering, the reply being searched behind.
+        self.expected_reply = None
+        self.ponder_move = None
+        self.ponder_time_limit = None
+        self.hit_time = None
+
+    def start(self, board, player, algorithm_func, evaluate_func, use_symmetry, time_limit, tt=None, book=None, tablebase=None,
+              stats=None):
+        self.cancel()
+        self.control = SearchControl(time_limit)
+        self.stats = stats
+        board_copy = [row[:] for row in board]
+        self.future = self.executor.submit(run_ai_search, board_copy, player, algorithm_func, evaluate_func,
+                                           use_symmetry, tt, self.control, book, tablebase, stats)
+
+    def ponder(self, board, player, algorithm_func, evaluate_func, use_symmetry, time_limit, tt=None, book=None,
+               tablebase=None, stats=None):
+        # Searches, with no clock, the position after the expected reply of
+        # player (the opponent, to move on board) while the opponent thinks.
+        # ponder_hit() then either keeps that search or drops it. Returns
+        # whether pondering started.
+        reply = self.expected_reply
+        self.cancel()
+        if reply is None or not is_valid_move(board, reply, player):
+            return False
+        self.control = SearchControl()
+        self.stats = stats
+        self.ponder_move = reply
+        self.ponder_time_limit = time_limit
+        self.future = self.executor.submit(run_ai_search, make_move(board, reply), 'b' if player == 'w' else 'w',
+                                           algorithm_func, evaluate_func, use_symmetry, tt, self.control, book,
+                                           tablebase, stats)
+        return True
+
+    def ponder_hit(self, move):
+        # Called with the move the opponent actually played. On a hit the
+        # ponder search becomes the real one and gets the normal time limit;
+        # on a miss it is stopped, leaving what it stored in the shared
+        # transposition table for the search that replaces it.
+        if self.ponder_move is None:
+            return False
+        if move != self.ponder_move:
+            self.cancel()
+            return False
+        self.ponder_move = None
+        self.hit_time = time.perf_counter()
+        self.control.set_time_limit(self.ponder_time_limit)
+        return True
+
+    def is_started(self):
+        return self.future is not None
+
+    def is_done(self):
+        return self.future is not None and self.future.done()
+
+    def progress(self):
+        if self.control is None:
+            return 0, 0
+        return self.control.depth, self.control.nodes
+
+    def result(self):
+        move, elapsed, depth, source = self.future.result()
+        pv = self.control.pv
+        self.expected_reply = pv[1] if len(pv) > 1 and pv[0] == move else None
+        if self.hit_time is not None:
+            # Only the wait after the opponent moved is response time.
+            elapsed = min(elapsed, time.perf_counter() - self.hit_time)
+        self.future = None
+        self.control = None
+        self.hit_time = None
+        return move, elapsed, depth, source
+
+    def cancel(self):
+        if self.future is not None:
+            self.control.stop()
+            self.future.cancel()
+        self.future = None
+        self.control = None
+        self.expected_reply = None
+        self.ponder_move = None
+        self.hit_time = None
+
+    def shutdown(self):
+        self.cancel()
+        self.executor.shutdown(wait=False, cancel_futures=True)
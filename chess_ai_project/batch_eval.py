@@ -0,0 +1,73 @@
+# Material and piece-square evaluation of many positions at once, as an
+# (N, 64) array of piece codes. The search does not use it: making and
+# status-checking each child costs more than the scalar evaluation it would
+# replace. It is meant for offline work such as scoring EPD suites or
+# training data.
+from .bitboard import EMPTY, QUEEN, CODE_MATERIAL, CODE_SQUARE_PST
+
+WHITE_PAWN, BLACK_PAWN = 0, 6
+WHITE_QUEEN, BLACK_QUEEN = QUEEN, 6 + QUEEN
+
+# numpy is imported on first use so that importing this module stays cheap for
+# callers that only check available().
+np = None
+MATERIAL_TABLE = PST_TABLE = SQUARE_INDEX = None
+_numpy_checked = False
+
+
+def _load_numpy():
+    global np, MATERIAL_TABLE, PST_TABLE, SQUARE_INDEX, _numpy_checked
+    if not _numpy_checked:
+        _numpy_checked = True
+        try:
+            import numpy
+        except ImportError:
+            return
+        np = numpy
+        # One row per piece code plus a zero row for EMPTY, so an (N, 64) array
+        # of codes can index the tables directly.
+        MATERIAL_TABLE = np.array([[value] * 64 for value in CODE_MATERIAL] + [[0] * 64], dtype=np.int32)
+        PST_TABLE = np.array(CODE_SQUARE_PST + [[0] * 64], dtype=np.int32)
+        SQUARE_INDEX = np.arange(64)
+
+
+def available():
+    _load_numpy()
+    return np is not None
+
+
+def encode_positions(positions):
+    return np.array([pos.squares for pos in positions], dtype=np.int8)
+
+
+def encode_children(pos, moves):
+    count = len(moves)
+    rows = np.arange(count)
+    encoded = np.array(moves, dtype=np.int32)
+    from_squares = encoded >> 6
+    to_squares = encoded & 63
+    to_rows = to_squares >> 3
+
+    codes = np.tile(np.array(pos.squares, dtype=np.int8), (count, 1))
+    placed = codes[rows, from_squares]
+    placed = np.where((placed == WHITE_PAWN) & (to_rows == 0), WHITE_QUEEN, placed)
+    placed = np.where((placed == BLACK_PAWN) & (to_rows == 7), BLACK_QUEEN, placed)
+    codes[rows, from_squares] = EMPTY
+    codes[rows, to_squares] = placed
+    return codes
+
+
+def batch_balances(codes):
+    material = MATERIAL_TABLE[codes, SQUARE_INDEX].sum(axis=1)
+    pst = PST_TABLE[codes, SQUARE_INDEX].sum(axis=1)
+    return material, pst
+
+
+def evaluate_batch(codes, player, evaluator, bonuses=None):
+    material, pst = batch_balances(codes)
+    scores = evaluator.material_weight * material + evaluator.pst_weight * pst
+    if player == 'b':
+        scores = -scores
+    if bonuses is not None:
+        scores = scores + evaluator.bonus_weight * np.asarray(bonuses, dtype=np.int32)
+    return scores
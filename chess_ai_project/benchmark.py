@@ -0,0 +1,140 @@
+import argparse
+import json
+import sys
+import time
+from . import bitboard
+from .bitboard import from_board
+from .board import board_from_fen, move_to_uci
+from .minimax import (minimax, minimax_no_ab, simple_heuristic_ai, pure_symmetry_reduction_ai, iterative_deepening,
+                     SearchControl, SEARCH_FEATURES)
+from .ai_configs import MENU_OPTIONS, resolve_config
+from .symmetry_reducer import reduce_encoded_symmetry
+
+CORPUS = [
+    ("after e4", "rnbqkbnr/pppppppp/8/8/4P3/8/PPPP1PPP/RNBQKBNR b"),
+    ("open game", "r1bqkb1r/pppp1ppp/2n2n2/4p3/2B1P3/5N2/PPPP1PPP/RNBQK2R b"),
+    ("queens gambit", "rnbqkb1r/ppp2ppp/4pn2/3p2B1/2PP4/2N5/PP2PPPP/R2QKBNR b"),
+    ("middlegame", "r2q1rk1/pp2bppp/2np1n2/2p1p3/2P1P1b1/2NP1NP1/PP2BP1P/R1BQ1RK1 b"),
+    ("tactics", "r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R b"),
+    ("endgame", "8/2p5/3p4/KP5r/1R3p1k/8/4P1P1/8 b"),
+]
+
+DEFAULT_DEPTH = 4
+DEFAULT_NO_AB_DEPTH = 3
+DEFAULT_THRESHOLD = 0.25
+DEFAULT_REPEAT = 5
+# A slower run only counts as a time regression if it also lost at least
+# this much wall time, so scheduler noise on millisecond searches does not
+# read as one. Node counts are deterministic and are compared exactly.
+MIN_SLOWDOWN_SECONDS = 0.05
+
+
+def leaf_count(board, player, use_symmetry):
+    pos = from_board(board)
+    valid_moves = bitboard.generate_moves(pos, player)
+    if use_symmetry:
+        valid_moves = reduce_encoded_symmetry(valid_moves, pos)
+    return len(valid_moves)
+
+
+def run_config(board, player, params, depth, no_ab_depth, disabled=()):
+    algorithm_func, evaluate_func, use_symmetry = resolve_config(params)
+    features = {feature: feature not in disabled for feature in SEARCH_FEATURES}
+    control = SearchControl()
+    start_time = time.perf_counter()
+    if algorithm_func == minimax:
+        _, move, depth_reached = iterative_deepening(board, player, evaluate_func, use_symmetry, max_depth=depth,
+                                                     control=control, **features)
+        nodes = control.nodes
+    elif algorithm_func == minimax_no_ab:
+        _, move, depth_reached = iterative_deepening(board, player, evaluate_func, use_symmetry, max_depth=no_ab_depth,
+                                                     alpha_beta=False, control=control)
+        nodes = control.nodes
+    elif algorithm_func == simple_heuristic_ai:
+        move = simple_heuristic_ai(board, player, evaluate_func, use_symmetry)
+        depth_reached = 1
+        nodes = 1 + leaf_count(board, player, use_symmetry)
+    else:
+        move = pure_symmetry_reduction_ai(board, player, use_symmetry=use_symmetry)
+        depth_reached = 0
+        nodes = 1
+    elapsed = time.perf_counter() - start_time
+    return {
+        "time": elapsed,
+        "nodes": nodes,
+        "nps": nodes / elapsed if elapsed > 0 else 0.0,
+        "depth": depth_reached,
+        "move": move_to_uci(move) if move else None,
+    }
+
+
+def run_benchmark(depth=DEFAULT_DEPTH, no_ab_depth=DEFAULT_NO_AB_DEPTH, repeat=DEFAULT_REPEAT, configs=None, disabled=()):
+    results = {}
+    for label, params in MENU_OPTIONS:
+        if configs and label not in configs:
+            continue
+        results[label] = {}
+        for name, fen in CORPUS:
+            board, player = board_from_fen(fen)
+            runs = [run_config(board, player, params, depth, no_ab_depth, disabled) for _ in range(repeat)]
+            best = min(runs, key=lambda run: run["time"])
+            results[label][name] = best
+            print(f"{label[:44]:44s} {name:14s} {best['time']:8.3f}s {best['nodes']:9d} nodes "
+                  f"{best['nps']:10,.0f} nodes/s")
+    return {
+        "settings": {"depth": depth, "no_ab_depth": no_ab_depth, "repeat": repeat, "disabled": sorted(disabled)},
+        "results": results,
+    }
+
+
+def compare(report, baseline, threshold=DEFAULT_THRESHOLD):
+    regressions = []
+    if report["settings"] != baseline["settings"]:
+        print(f"warning: settings differ from the baseline ({baseline['settings']})")
+    for label, positions in report["results"].items():
+        for name, run in positions.items():
+            base = baseline["results"].get(label, {}).get(name)
+            if base is None:
+                continue
+            slowdown = run["time"] - base["time"]
+            node_ratio = run["nodes"] / base["nodes"] if base["nodes"] else 1.0
+            if run["time"] > base["time"] * (1 + threshold) and slowdown >= MIN_SLOWDOWN_SECONDS:
+                regressions.append(f"{label} / {name}: time {base['time']:.3f}s -> {run['time']:.3f}s")
+            if node_ratio > 1 + threshold:
+                regressions.append(f"{label} / {name}: nodes {base['nodes']} -> {run['nodes']}")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Time every menu AI configuration over a fixed position corpus.")
+    parser.add_argument("--depth", type=int, default=DEFAULT_DEPTH, help="alpha-beta search depth")
+    parser.add_argument("--no-ab-depth", type=int, default=DEFAULT_NO_AB_DEPTH, help="plain minimax search depth")
+    parser.add_argument("--repeat", type=int, default=DEFAULT_REPEAT, help="runs per position; the fastest is kept")
+    parser.add_argument("--config", action="append", help="only run the menu option with this label")
+    parser.add_argument("--disable", action="append", choices=SEARCH_FEATURES, default=[],
+                        help="switch off an alpha-beta search feature")
+    parser.add_argument("--save", metavar="PATH", help="write the results as a JSON baseline")
+    parser.add_argument("--compare", metavar="PATH", help="fail if slower than this JSON baseline")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="allowed fractional slowdown or node growth before failing")
+    args = parser.parse_args(argv)
+
+    report = run_benchmark(args.depth, args.no_ab_depth, args.repeat, args.config, args.disable)
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump(report, f, indent=2)
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        regressions = compare(report, baseline, args.threshold)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        if regressions:
+            return 1
+        print("no regressions")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,579 @@
+import random
+from .piece_tables import PIECE_VALUES, PST_VALUES
+from .symmetry_reducer import MIRROR_SQUARE
+
+WHITE, BLACK = 0, 1
+PAWN, KNIGHT, BISHOP, ROOK, QUEEN, KING = range(6)
+EMPTY = 12
+
+COLORS = ("w", "b")
+PIECE_NAMES = ("pawn", "knight", "bishop", "rook", "queen", "king")
+NORMAL, CHECK, CHECKMATE, STALEMATE = range(4)
+
+CODE_NAMES = [f"{color}_{name}" for color in COLORS for name in PIECE_NAMES] + [""]
+PIECE_CODES = {name: code for code, name in enumerate(CODE_NAMES)}
+CODE_COLOR = [WHITE] * 6 + [BLACK] * 6 + [None]
+CODE_TYPE = list(range(6)) * 2 + [None]
+
+BIT = [1 << sq for sq in range(64)]
+FULL_BOARD = (1 << 64) - 1
+
+KNIGHT_OFFSETS = [(-2, -1), (-2, 1), (-1, -2), (-1, 2), (1, -2), (1, 2), (2, -1), (2, 1)]
+KING_OFFSETS = [(dr, dc) for dr in (-1, 0, 1) for dc in (-1, 0, 1) if dr or dc]
+DIRECTIONS = [(-1, -1), (-1, 1), (1, -1), (1, 1), (-1, 0), (1, 0), (0, -1), (0, 1)]
+BISHOP_DIRECTIONS = range(0, 4)
+ROOK_DIRECTIONS = range(4, 8)
+QUEEN_DIRECTIONS = range(0, 8)
+RAY_POSITIVE = [dr * 8 + dc > 0 for dr, dc in DIRECTIONS]
+
+
+def color_index(player):
+    return WHITE if player == "w" else BLACK
+
+
+def square(row, col):
+    return row * 8 + col
+
+
+def _mask(squares):
+    mask = 0
+    for sq in squares:
+        mask |= BIT[sq]
+    return mask
+
+
+def _offset_targets(sq, offsets):
+    row, col = divmod(sq, 8)
+    return [square(row + dr, col + dc) for dr, dc in offsets
+            if 0 <= row + dr < 8 and 0 <= col + dc < 8]
+
+
+def _ray(sq, dr, dc):
+    row, col = divmod(sq, 8)
+    ray = []
+    row, col = row + dr, col + dc
+    while 0 <= row < 8 and 0 <= col < 8:
+        ray.append(square(row, col))
+        row, col = row + dr, col + dc
+    return ray
+
+
+KNIGHT_TARGETS = [_offset_targets(sq, KNIGHT_OFFSETS) for sq in range(64)]
+KING_TARGETS = [_offset_targets(sq, KING_OFFSETS) for sq in range(64)]
+KNIGHT_ATTACKS = [_mask(targets) for targets in KNIGHT_TARGETS]
+KING_ATTACKS = [_mask(targets) for targets in KING_TARGETS]
+
+RAYS = [[_ray(sq, dr, dc) for sq in range(64)] for dr, dc in DIRECTIONS]
+RAY_MASKS = [[_mask(ray) for ray in rays] for rays in RAYS]
+DIAGONAL_LINES = [RAY_MASKS[0][sq] | RAY_MASKS[1][sq] | RAY_MASKS[2][sq] | RAY_MASKS[3][sq] for sq in range(64)]
+STRAIGHT_LINES = [RAY_MASKS[4][sq] | RAY_MASKS[5][sq] | RAY_MASKS[6][sq] | RAY_MASKS[7][sq] for sq in range(64)]
+
+PAWN_STEP = [-8, 8]
+PAWN_START_ROW = [6, 1]
+PROMOTION_ROW = [0, 7]
+PAWN_ATTACKS = [
+    [_mask(_offset_targets(sq, [(-1, -1), (-1, 1)])) for sq in range(64)],
+    [_mask(_offset_targets(sq, [(1, -1), (1, 1)])) for sq in range(64)],
+]
+
+# Pieces may move to empty squares or capture any enemy piece except the king;
+# only the king itself is allowed to land on the enemy king.
+TARGETABLE = [
+    [code == EMPTY or (CODE_COLOR[code] == 1 - color and CODE_TYPE[code] != KING) for code in range(13)]
+    for color in (WHITE, BLACK)
+]
+KING_TARGETABLE = [
+    [code == EMPTY or CODE_COLOR[code] == 1 - color for code in range(13)]
+    for color in (WHITE, BLACK)
+]
+
+# Signed so that white pieces count positive and black pieces negative.
+CODE_MATERIAL = [PIECE_VALUES[PIECE_NAMES[CODE_TYPE[code]]] * (1 if CODE_COLOR[code] == WHITE else -1)
+                 for code in range(12)]
+CODE_SQUARE_PST = [
+    [PST_VALUES[PIECE_NAMES[CODE_TYPE[code]]][row if CODE_COLOR[code] == WHITE else 7 - row][col]
+     * (1 if CODE_COLOR[code] == WHITE else -1)
+     for row in range(8) for col in range(8)]
+    for code in range(12)
+]
+
+_zobrist_random = random.Random(20240601)
+ZOBRIST_PIECES = [[_zobrist_random.getrandbits(64) for sq in range(64)] for code in range(12)]
+ZOBRIST_BLACK_TO_MOVE = _zobrist_random.getrandbits(64)
+
+MOVE_TUPLES = [(divmod(move >> 6, 8), divmod(move & 63, 8)) for move in range(4096)]
+
+ZOBRIST_MIRRORED = [[ZOBRIST_PIECES[code][sq ^ MIRROR_SQUARE] for sq in range(64)] for code in range(12)]
+
+
+def encode_move(move):
+    (from_row, from_col), (to_row, to_col) = move
+    return (from_row * 8 + from_col) << 6 | (to_row * 8 + to_col)
+
+
+def decode_move(move):
+    return MOVE_TUPLES[move]
+
+
+class Position:
+    def __init__(self):
+        self.squares = [EMPTY] * 64
+        self.bitboards = [0] * 12
+        self.occupancy = [0, 0]
+        self.occupied = 0
+        self.key = 0
+        # Key of the file-mirrored position, kept alongside key.
+        self.mirror_key = 0
+        self.material = 0
+        self.pst = 0
+        self.history = []
+
+    def put(self, sq, code):
+        bit = BIT[sq]
+        self.squares[sq] = code
+        self.bitboards[code] |= bit
+        self.occupancy[CODE_COLOR[code]] |= bit
+        self.occupied |= bit
+        self.key ^= ZOBRIST_PIECES[code][sq]
+        self.mirror_key ^= ZOBRIST_MIRRORED[code][sq]
+        self.material += CODE_MATERIAL[code]
+        self.pst += CODE_SQUARE_PST[code][sq]
+
+    def make_move(self, move):
+        from_sq = move >> 6
+        to_sq = move & 63
+        squares = self.squares
+        bitboards = self.bitboards
+        occupancy = self.occupancy
+        piece = squares[from_sq]
+        captured = squares[to_sq]
+        color = CODE_COLOR[piece]
+        from_bit = BIT[from_sq]
+        to_bit = BIT[to_sq]
+
+        key = self.key
+        mirror_key = self.mirror_key
+        material = self.material
+        pst = self.pst
+        self.history.append((move, piece, captured, key, mirror_key, material, pst))
+        if captured != EMPTY:
+            bitboards[captured] ^= to_bit
+            occupancy[CODE_COLOR[captured]] ^= to_bit
+            key ^= ZOBRIST_PIECES[captured][to_sq]
+            mirror_key ^= ZOBRIST_MIRRORED[captured][to_sq]
+            material -= CODE_MATERIAL[captured]
+            pst -= CODE_SQUARE_PST[captured][to_sq]
+
+        placed = piece
+        if CODE_TYPE[piece] == PAWN and to_sq >> 3 == PROMOTION_ROW[color]:
+            placed = color * 6 + QUEEN
+            material += CODE_MATERIAL[placed] - CODE_MATERIAL[piece]
+
+        squares[from_sq] = EMPTY
+        squares[to_sq] = placed
+        bitboards[piece] ^= from_bit
+        bitboards[placed] ^= to_bit
+        occupancy[color] ^= from_bit | to_bit
+        self.occupied = occupancy[0] | occupancy[1]
+        self.key = key ^ ZOBRIST_PIECES[piece][from_sq] ^ ZOBRIST_PIECES[placed][to_sq]
+        self.mirror_key = mirror_key ^ ZOBRIST_MIRRORED[piece][from_sq] ^ ZOBRIST_MIRRORED[placed][to_sq]
+        self.material = material
+        self.pst = pst - CODE_SQUARE_PST[piece][from_sq] + CODE_SQUARE_PST[placed][to_sq]
+
+    def unmake_move(self):
+        move, piece, captured, self.key, self.mirror_key, self.material, self.pst = self.history.pop()
+        from_sq = move >> 6
+        to_sq = move & 63
+        squares = self.squares
+        bitboards = self.bitboards
+        occupancy = self.occupancy
+        color = CODE_COLOR[piece]
+        from_bit = BIT[from_sq]
+        to_bit = BIT[to_sq]
+
+        bitboards[squares[to_sq]] ^= to_bit
+        bitboards[piece] ^= from_bit
+        occupancy[color] ^= from_bit | to_bit
+        squares[from_sq] = piece
+        squares[to_sq] = captured
+
+        if captured != EMPTY:
+            bitboards[captured] ^= to_bit
+            occupancy[CODE_COLOR[captured]] ^= to_bit
+        self.occupied = occupancy[0] | occupancy[1]
+
+    def search_key(self, player):
+        return self.key ^ ZOBRIST_BLACK_TO_MOVE if player == "b" else self.key
+
+    def canonical_key(self, player):
+        # One key for a position and its file mirror: the smaller of the two.
+        # The flag says the key belongs to the mirror image, so moves stored
+        # under it have to be mirrored to apply here.
+        key, mirror_key = self.key, self.mirror_key
+        if player == "b":
+            key ^= ZOBRIST_BLACK_TO_MOVE
+            mirror_key ^= ZOBRIST_BLACK_TO_MOVE
+        if mirror_key < key:
+            return mirror_key, True
+        return key, False
+
+    def king_square(self, color):
+        kings = self.bitboards[color * 6 + KING]
+        if not kings:
+            return None
+        return (kings & -kings).bit_length() - 1
+
+
+def from_board(board):
+    pos = Position()
+    for row in range(8):
+        board_row = board[row]
+        for col in range(8):
+            piece = board_row[col]
+            if piece:
+                pos.put(row * 8 + col, PIECE_CODES[piece])
+    return pos
+
+
+def to_board(pos):
+    squares = pos.squares
+    return [[CODE_NAMES[code] for code in squares[row * 8:row * 8 + 8]] for row in range(8)]
+
+
+def attacks_square(bitboards, occupied, sq, by, removed=0):
+    base = by * 6
+    if PAWN_ATTACKS[1 - by][sq] & bitboards[base + PAWN] & ~removed:
+        return True
+    if KNIGHT_ATTACKS[sq] & bitboards[base + KNIGHT] & ~removed:
+        return True
+
+    diagonal = (bitboards[base + BISHOP] | bitboards[base + QUEEN]) & ~removed
+    if diagonal & DIAGONAL_LINES[sq] and _slider_on_ray(diagonal, occupied, sq, BISHOP_DIRECTIONS):
+        return True
+    straight = (bitboards[base + ROOK] | bitboards[base + QUEEN]) & ~removed
+    if straight & STRAIGHT_LINES[sq] and _slider_on_ray(straight, occupied, sq, ROOK_DIRECTIONS):
+        return True
+    return False
+
+
+def _slider_on_ray(sliders, occupied, sq, directions):
+    for direction in directions:
+        ray = RAY_MASKS[direction][sq]
+        if not sliders & ray:
+            continue
+        blockers = ray & occupied
+        if RAY_POSITIVE[direction]:
+            first = blockers & -blockers
+        else:
+            first = 1 << (blockers.bit_length() - 1)
+        if first & sliders:
+            return True
+    return False
+
+
+def is_in_check(pos, player):
+    # Like the list-based board, only pawns, knights and sliders give check.
+    color = color_index(player)
+    king_sq = pos.king_square(color)
+    if king_sq is None:
+        return False
+    return attacks_square(pos.bitboards, pos.occupied, king_sq, 1 - color)
+
+
+def _first_blocker(blockers, direction):
+    if RAY_POSITIVE[direction]:
+        return blockers & -blockers
+    return 1 << (blockers.bit_length() - 1)
+
+
+def king_threats(pos, color, king_sq):
+    # Returns (checkers, evasion mask, pins); a pinned piece maps to the squares
+    # between its king and the pinner, pinner included.
+    base = (1 - color) * 6
+    bitboards = pos.bitboards
+    occupied = pos.occupied
+    own = pos.occupancy[color]
+    checkers = (PAWN_ATTACKS[color][king_sq] & bitboards[base + PAWN]) | (KNIGHT_ATTACKS[king_sq] & bitboards[base + KNIGHT])
+    evasion = checkers
+    pins = {}
+
+    diagonal = bitboards[base + BISHOP] | bitboards[base + QUEEN]
+    straight = bitboards[base + ROOK] | bitboards[base + QUEEN]
+    for direction in QUEEN_DIRECTIONS:
+        sliders = diagonal if direction < 4 else straight
+        rays = RAY_MASKS[direction]
+        ray = rays[king_sq]
+        if not sliders & ray:
+            continue
+        blockers = ray & occupied
+        first = _first_blocker(blockers, direction)
+        if first & sliders:
+            checkers |= first
+            evasion |= ray ^ rays[first.bit_length() - 1]
+        elif first & own:
+            second = _first_blocker(blockers ^ first, direction)
+            if second & sliders:
+                pins[first.bit_length() - 1] = ray ^ rays[second.bit_length() - 1]
+    return checkers, evasion, pins
+
+
+def _threats(pos, color):
+    king_sq = pos.king_square(color)
+    if king_sq is None:
+        return None, 0, FULL_BOARD, {}
+    checkers, evasion, pins = king_threats(pos, color, king_sq)
+    return king_sq, checkers, evasion if checkers else FULL_BOARD, pins
+
+
+def has_legal_move(pos, player):
+    color = color_index(player)
+    return _has_legal_move(pos, color, *_threats(pos, color))
+
+
+def _has_legal_move(pos, color, king_sq, checkers, evasion, pins):
+    enemy = 1 - color
+    squares = pos.squares
+    bitboards = pos.bitboards
+    occupied = pos.occupied
+
+    if king_sq is not None:
+        king_targetable = KING_TARGETABLE[color]
+        without_king = occupied ^ BIT[king_sq]
+        for to_sq in KING_TARGETS[king_sq]:
+            if king_targetable[squares[to_sq]]:
+                to_bit = BIT[to_sq]
+                if not attacks_square(bitboards, without_king | to_bit, to_sq, enemy, to_bit):
+                    return True
+        if checkers & (checkers - 1):
+            return False
+
+    enemy_king = bitboards[enemy * 6 + KING]
+    capturable = pos.occupancy[enemy] & ~enemy_king
+    reachable = ~pos.occupancy[color] & ~enemy_king
+    own = pos.occupancy[color] & ~bitboards[color * 6 + KING]
+    while own:
+        bit = own & -own
+        own ^= bit
+        sq = bit.bit_length() - 1
+        allowed = evasion & pins[sq] if sq in pins else evasion
+        if not allowed:
+            continue
+        piece_type = CODE_TYPE[squares[sq]]
+
+        if piece_type == PAWN:
+            next_row = (sq >> 3) + (1 if color == BLACK else -1)
+            if not 0 <= next_row < 8:
+                continue
+            to_sq = sq + PAWN_STEP[color]
+            if squares[to_sq] == EMPTY:
+                if allowed & BIT[to_sq]:
+                    return True
+                if sq >> 3 == PAWN_START_ROW[color]:
+                    to_sq2 = to_sq + PAWN_STEP[color]
+                    if squares[to_sq2] == EMPTY and allowed & BIT[to_sq2]:
+                        return True
+            if PAWN_ATTACKS[color][sq] & capturable & allowed:
+                return True
+
+        elif piece_type == KNIGHT:
+            if KNIGHT_ATTACKS[sq] & reachable & allowed:
+                return True
+
+        else:
+            if piece_type == BISHOP:
+                directions = BISHOP_DIRECTIONS
+            elif piece_type == ROOK:
+                directions = ROOK_DIRECTIONS
+            else:
+                directions = QUEEN_DIRECTIONS
+            for direction in directions:
+                rays = RAY_MASKS[direction]
+                ray = rays[sq]
+                if not ray & allowed:
+                    continue
+                blockers = ray & occupied
+                if blockers:
+                    first = _first_blocker(blockers, direction)
+                    ray ^= rays[first.bit_length() - 1]
+                    if not first & capturable:
+                        ray ^= first
+                if ray & allowed:
+                    return True
+
+    return False
+
+
+def position_status(pos, player, detect_stalemate=True):
+    color = color_index(player)
+    threats = _threats(pos, color)
+    if not threats[1] and not detect_stalemate:
+        return NORMAL
+    if _has_legal_move(pos, color, *threats):
+        return CHECK if threats[1] else NORMAL
+    return CHECKMATE if threats[1] else STALEMATE
+
+
+def is_checkmate(pos, player):
+    return position_status(pos, player) == CHECKMATE
+
+
+def is_stalemate(pos, player):
+    return position_status(pos, player) == STALEMATE
+
+
+def generate_moves(pos, player):
+    color = color_index(player)
+    enemy = 1 - color
+    squares = pos.squares
+    bitboards = pos.bitboards
+    occupied = pos.occupied
+    targetable = TARGETABLE[color]
+    moves = []
+
+    king_sq, checkers, evasion, pins = _threats(pos, color)
+    double_check = checkers & (checkers - 1)
+
+    own = pos.occupancy[color]
+    while own:
+        bit = own & -own
+        own ^= bit
+        sq = bit.bit_length() - 1
+        piece_type = CODE_TYPE[squares[sq]]
+
+        if piece_type == KING:
+            king_targetable = KING_TARGETABLE[color]
+            without_king = occupied ^ bit
+            for to_sq in KING_TARGETS[sq]:
+                if king_targetable[squares[to_sq]]:
+                    to_bit = BIT[to_sq]
+                    if not attacks_square(bitboards, without_king | to_bit, to_sq, enemy, to_bit):
+                        moves.append(sq << 6 | to_sq)
+            continue
+
+        if double_check:
+            continue
+        allowed = evasion
+        if sq in pins:
+            allowed &= pins[sq]
+            if not allowed:
+                continue
+
+        if piece_type == PAWN:
+            row, col = divmod(sq, 8)
+            step = PAWN_STEP[color]
+            next_row = row + (1 if color == BLACK else -1)
+            if not 0 <= next_row < 8:
+                continue
+            to_sq = sq + step
+            if squares[to_sq] == EMPTY:
+                if allowed & BIT[to_sq]:
+                    moves.append(sq << 6 | to_sq)
+                if row == PAWN_START_ROW[color]:
+                    to_sq2 = to_sq + step
+                    if squares[to_sq2] == EMPTY and allowed & BIT[to_sq2]:
+                        moves.append(sq << 6 | to_sq2)
+            for dc in (-1, 1):
+                if 0 <= col + dc < 8:
+                    to_sq = next_row * 8 + col + dc
+                    target = squares[to_sq]
+                    if target != EMPTY and targetable[target] and allowed & BIT[to_sq]:
+                        moves.append(sq << 6 | to_sq)
+
+        elif piece_type == KNIGHT:
+            if not KNIGHT_ATTACKS[sq] & allowed:
+                continue
+            for to_sq in KNIGHT_TARGETS[sq]:
+                if targetable[squares[to_sq]] and allowed & BIT[to_sq]:
+                    moves.append(sq << 6 | to_sq)
+
+        else:
+            if piece_type == BISHOP:
+                directions = BISHOP_DIRECTIONS
+            elif piece_type == ROOK:
+                directions = ROOK_DIRECTIONS
+            else:
+                directions = QUEEN_DIRECTIONS
+            for direction in directions:
+                if not RAY_MASKS[direction][sq] & allowed:
+                    continue
+                for to_sq in RAYS[direction][sq]:
+                    target = squares[to_sq]
+                    if target == EMPTY:
+                        if allowed & BIT[to_sq]:
+                            moves.append(sq << 6 | to_sq)
+                        continue
+                    if targetable[target] and allowed & BIT[to_sq]:
+                        moves.append(sq << 6 | to_sq)
+                    break
+
+    return moves
+
+
+def generate_captures(pos, player):
+    # The captures and promotions from generate_moves, found straight from the
+    # attack masks without walking the empty squares of each ray.
+    color = color_index(player)
+    enemy = 1 - color
+    squares = pos.squares
+    bitboards = pos.bitboards
+    occupied = pos.occupied
+    moves = []
+
+    king_sq, checkers, evasion, pins = _threats(pos, color)
+    double_check = checkers & (checkers - 1)
+    capturable = pos.occupancy[enemy] & ~bitboards[enemy * 6 + KING]
+
+    own = pos.occupancy[color]
+    while own:
+        bit = own & -own
+        own ^= bit
+        sq = bit.bit_length() - 1
+        piece_type = CODE_TYPE[squares[sq]]
+
+        if piece_type == KING:
+            without_king = occupied ^ bit
+            targets = KING_ATTACKS[sq] & pos.occupancy[enemy]
+            while targets:
+                to_bit = targets & -targets
+                targets ^= to_bit
+                to_sq = to_bit.bit_length() - 1
+                if not attacks_square(bitboards, without_king, to_sq, enemy, to_bit):
+                    moves.append(sq << 6 | to_sq)
+            continue
+
+        if double_check:
+            continue
+        allowed = evasion
+        if sq in pins:
+            allowed &= pins[sq]
+            if not allowed:
+                continue
+
+        if piece_type == PAWN:
+            targets = PAWN_ATTACKS[color][sq] & capturable & allowed
+            to_sq = sq + PAWN_STEP[color]
+            if 0 <= to_sq < 64 and to_sq >> 3 == PROMOTION_ROW[color] and squares[to_sq] == EMPTY \
+                    and allowed & BIT[to_sq]:
+                moves.append(sq << 6 | to_sq)
+        elif piece_type == KNIGHT:
+            targets = KNIGHT_ATTACKS[sq] & capturable & allowed
+        else:
+            if piece_type == BISHOP:
+                directions = BISHOP_DIRECTIONS
+            elif piece_type == ROOK:
+                directions = ROOK_DIRECTIONS
+            else:
+                directions = QUEEN_DIRECTIONS
+            targets = 0
+            for direction in directions:
+                blockers = RAY_MASKS[direction][sq] & occupied
+                if blockers:
+                    targets |= _first_blocker(blockers, direction)
+            targets &= capturable & allowed
+
+        while targets:
+            to_bit = targets & -targets
+            targets ^= to_bit
+            moves.append(sq << 6 | (to_bit.bit_length() - 1))
+
+    return moves
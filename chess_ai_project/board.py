@@ -1,138 +1,20 @@
-def inside_board(row, col):
-    return 0 <= row < 8 and 0 <= col < 8
+import re
+from . import bitboard
+from .bitboard import from_board, MOVE_TUPLES, CHECK, CHECKMATE
 
 
-def is_square_threatened_by_pawn(board, row, col, player):
-    enemy = 'b' if player == 'w' else 'w'
-    pawn_direction = 1 if enemy == 'b' else -1
-
-    for dc in [-1, 1]:
-        pr, pc = row - pawn_direction, col + dc
-        if inside_board(pr, pc):
-            piece = board[pr][pc]
-            if piece == f"{enemy}_pawn":
-                return True
-    return False
+def inside_board(row, col):
+    return 0 <= row < 8 and 0 <= col < 8
 
 
 def generate_moves(board, player):
-    moves = []
-    enemy_prefix = "w_" if player == "b" else "b_"
-    enemy = 'b' if player == 'w' else 'w'
-
-    for r in range(8):
-        for c in range(8):
-            piece = board[r][c]
-            if not piece.startswith(player):
-                continue
+    pos = from_board(board)
+    return [MOVE_TUPLES[move] for move in bitboard.generate_moves(pos, player)]
+
 
-            piece_type = piece[2:]
-
-            if piece_type == "pawn":
-                direction = 1 if player == "b" else -1
-
-                nr, nc = r + direction, c
-                if inside_board(nr, nc) and board[nr][nc] == "":
-                    temp_board = make_move(board, ((r, c), (nr, nc)))
-                    if not is_in_check(temp_board, player):
-                        moves.append(((r, c), (nr, nc)))
-
-                    start_row = 1 if player == "b" else 6
-                    if r == start_row:
-                        nr2 = r + 2 * direction
-                        if inside_board(nr2, nc) and board[nr2][nc] == "" and board[nr][nc] == "":
-                            temp_board = make_move(board, ((r, c), (nr2, nc)))
-                            if not is_in_check(temp_board, player):
-                                moves.append(((r, c), (nr2, nc)))
-
-                for dc in [-1, 1]:
-                    nr, nc = r + direction, c + dc
-                    if inside_board(nr, nc) and board[nr][nc].startswith(enemy_prefix):
-                        if not board[nr][nc].endswith("king"):
-                            temp_board = make_move(board, ((r, c), (nr, nc)))
-                            if not is_in_check(temp_board, player):
-                                moves.append(((r, c), (nr, nc)))
-
-            elif piece_type == "king":
-                for dr in [-1, 0, 1]:
-                    for dc in [-1, 0, 1]:
-                        if dr == 0 and dc == 0:
-                            continue
-                        nr, nc = r + dr, c + dc
-                        if inside_board(nr, nc) and not board[nr][nc].startswith(player):
-                            temp_board = [row[:] for row in board]
-                            temp_board[r][c] = ""
-                            temp_board[nr][nc] = f"{player}_king"
-                            if not is_in_check(temp_board, player):
-                                moves.append(((r, c), (nr, nc)))
-
-            elif piece_type == "knight":
-                for dr, dc in [(-2, -1), (-2, 1), (-1, -2), (-1, 2), (1, -2), (1, 2), (2, -1), (2, 1)]:
-                    nr, nc = r + dr, c + dc
-                    if inside_board(nr, nc) and not board[nr][nc].startswith(player):
-                        if not board[nr][nc].endswith("king"):
-                            temp_board = make_move(board, ((r, c), (nr, nc)))
-                            if not is_in_check(temp_board, player):
-                                moves.append(((r, c), (nr, nc)))
-
-            elif piece_type == "bishop":
-                for dr, dc in [(-1, -1), (-1, 1), (1, -1), (1, 1)]:
-                    nr, nc = r + dr, c + dc
-                    while inside_board(nr, nc):
-                        if board[nr][nc] == "":
-                            temp_board = make_move(board, ((r, c), (nr, nc)))
-                            if not is_in_check(temp_board, player):
-                                moves.append(((r, c), (nr, nc)))
-                        elif board[nr][nc].startswith(enemy_prefix):
-                            if not board[nr][nc].endswith("king"):
-                                temp_board = make_move(board, ((r, c), (nr, nc)))
-                                if not is_in_check(temp_board, player):
-                                    moves.append(((r, c), (nr, nc)))
-                            break
-                        else:
-                            break
-                        nr += dr
-                        nc += dc
-
-            elif piece_type == "rook":
-                for dr, dc in [(-1, 0), (1, 0), (0, -1), (0, 1)]:
-                    nr, nc = r + dr, c + dc
-                    while inside_board(nr, nc):
-                        if board[nr][nc] == "":
-                            temp_board = make_move(board, ((r, c), (nr, nc)))
-                            if not is_in_check(temp_board, player):
-                                moves.append(((r, c), (nr, nc)))
-                        elif board[nr][nc].startswith(enemy_prefix):
-                            if not board[nr][nc].endswith("king"):
-                                temp_board = make_move(board, ((r, c), (nr, nc)))
-                                if not is_in_check(temp_board, player):
-                                    moves.append(((r, c), (nr, nc)))
-                            break
-                        else:
-                            break
-                        nr += dr
-                        nc += dc
-
-            elif piece_type == "queen":
-                for dr, dc in [(-1, -1), (-1, 1), (1, -1), (1, 1), (-1, 0), (1, 0), (0, -1), (0, 1)]:
-                    nr, nc = r + dr, c + dc
-                    while inside_board(nr, nc):
-                        if board[nr][nc] == "":
-                            temp_board = make_move(board, ((r, c), (nr, nc)))
-                            if not is_in_check(temp_board, player):
-                                moves.append(((r, c), (nr, nc)))
-                        elif board[nr][nc].startswith(enemy_prefix):
-                            if not board[nr][nc].endswith("king"):
-                                temp_board = make_move(board, ((r, c), (nr, nc)))
-                                if not is_in_check(temp_board, player):
-                                    moves.append(((r, c), (nr, nc)))
-                            break
-                        else:
-                            break
-                        nr += dr
-                        nc += dc
-
-    return moves
+def generate_captures(board, player):
+    pos = from_board(board)
+    return [MOVE_TUPLES[move] for move in bitboard.generate_captures(pos, player)]
 
 
 def is_valid_move(board, move, player):
@@ -176,60 +58,141 @@ def make_move(board, move):
     return new_board
 
 
-def find_king(board, player):
-    for r in range(8):
-        for c in range(8):
-            if board[r][c] == f"{player}_king":
-                return (r, c)
-    return None
-
-
 def is_in_check(board, player):
-    king_pos = find_king(board, player)
-    if not king_pos:
-        return False
+    return bitboard.is_in_check(from_board(board), player)
 
-    king_row, king_col = king_pos
-    opponent = 'w' if player == 'b' else 'b'
-
-    if is_square_threatened_by_pawn(board, king_row, king_col, player):
-        return True
-
-    for dr, dc in [(-2, -1), (-2, 1), (-1, -2), (-1, 2), (1, -2), (1, 2), (2, -1), (2, 1)]:
-        nr, nc = king_row + dr, king_col + dc
-        if inside_board(nr, nc):
-            piece = board[nr][nc]
-            if piece == f"{opponent}_knight":
-                return True
-
-    for dr, dc in [(-1, -1), (-1, 1), (1, -1), (1, 1), (-1, 0), (1, 0), (0, -1), (0, 1)]:
-        nr, nc = king_row + dr, king_col + dc
-        while inside_board(nr, nc):
-            piece = board[nr][nc]
-            if piece != "":
-                if piece.startswith(opponent):
-                    piece_type = piece[2:]
-                    if (piece_type == "bishop" and abs(dr) == abs(dc)) or \
-                       (piece_type == "rook" and (dr == 0 or dc == 0)) or \
-                       (piece_type == "queen"):
-                        return True
-                break
-            nr += dr
-            nc += dc
-
-    return False
+
+def position_status(board, player):
+    return bitboard.position_status(from_board(board), player)
 
 
 def is_checkmate(board, player):
-    if is_in_check(board, player):
-        return len(generate_moves(board, player)) == 0
-    return False
+    return bitboard.is_checkmate(from_board(board), player)
 
 
 def is_stalemate(board, player):
-    if not is_in_check(board, player):
-        return len(generate_moves(board, player)) == 0
-    return False
+    return bitboard.is_stalemate(from_board(board), player)
+
+
+FEN_PIECES = {"p": "pawn", "n": "knight", "b": "bishop", "r": "rook", "q": "queen", "k": "king"}
+FEN_LETTERS = {name: letter for letter, name in FEN_PIECES.items()}
+SAN_PATTERN = re.compile(r"^([NBRQK])?([a-h])?([1-8])?x?([a-h][1-8])(=?[NBRQ])?$")
+
+
+def board_from_fen(fen):
+    fields = fen.split()
+    board = []
+    for rank in fields[0].split("/"):
+        row = []
+        for char in rank:
+            if char.isdigit():
+                row.extend([""] * int(char))
+            elif char.lower() in FEN_PIECES:
+                row.append(("w_" if char.isupper() else "b_") + FEN_PIECES[char.lower()])
+            else:
+                raise ValueError(f"Invalid piece in FEN: {char}")
+        board.append(row)
+    if len(board) != 8 or any(len(row) != 8 for row in board):
+        raise ValueError(f"Invalid FEN placement: {fields[0]}")
+    player = fields[1] if len(fields) > 1 else 'w'
+    if player not in ('w', 'b'):
+        raise ValueError(f"Invalid side to move in FEN: {player}")
+    return board, player
+
+
+def board_to_fen(board, player):
+    ranks = []
+    for row in board:
+        rank = ""
+        empty = 0
+        for piece in row:
+            if piece == "":
+                empty += 1
+                continue
+            if empty:
+                rank += str(empty)
+                empty = 0
+            letter = FEN_LETTERS[piece[2:]]
+            rank += letter.upper() if piece.startswith("w") else letter
+        if empty:
+            rank += str(empty)
+        ranks.append(rank)
+    # No castling or en passant in this engine, so those fields are always empty.
+    return "/".join(ranks) + f" {player} - - 0 1"
+
+
+def square_name(row, col):
+    return "abcdefgh"[col] + str(8 - row)
+
+
+def move_to_uci(move):
+    (from_row, from_col), (to_row, to_col) = move
+    return square_name(from_row, from_col) + square_name(to_row, to_col)
+
+
+def move_from_uci(text):
+    if len(text) < 4 or text[0] not in "abcdefgh" or text[2] not in "abcdefgh" or \
+            text[1] not in "12345678" or text[3] not in "12345678":
+        raise ValueError(f"Invalid move: {text}")
+    return (8 - int(text[1]), "abcdefgh".index(text[0])), (8 - int(text[3]), "abcdefgh".index(text[2]))
+
+
+def move_to_san(board, player, move, legal_moves=None):
+    if legal_moves is None:
+        legal_moves = generate_moves(board, player)
+    (from_row, from_col), (to_row, to_col) = move
+    piece = board[from_row][from_col][2:]
+    capture = board[to_row][to_col] != ""
+    target = square_name(to_row, to_col)
+
+    if piece == "pawn":
+        san = ("abcdefgh"[from_col] + "x" if capture else "") + target
+        if to_row in (0, 7):
+            san += "=Q"
+    else:
+        rivals = [other[0] for other in legal_moves
+                  if other[1] == move[1] and other[0] != move[0] and board[other[0][0]][other[0][1]][2:] == piece]
+        disambiguation = ""
+        if rivals:
+            if all(col != from_col for _, col in rivals):
+                disambiguation = "abcdefgh"[from_col]
+            elif all(row != from_row for row, _ in rivals):
+                disambiguation = str(8 - from_row)
+            else:
+                disambiguation = square_name(from_row, from_col)
+        san = FEN_LETTERS[piece].upper() + disambiguation + ("x" if capture else "") + target
+
+    opponent = 'b' if player == 'w' else 'w'
+    status = position_status(make_move(board, move), opponent)
+    if status == CHECKMATE:
+        san += "#"
+    elif status == CHECK:
+        san += "+"
+    return san
+
+
+def move_from_san(board, player, text):
+    # Accepts SAN with or without check marks and annotations, including
+    # over-disambiguated moves such as "Nge2", and plain coordinate moves.
+    legal_moves = generate_moves(board, player)
+    match = SAN_PATTERN.match(text.rstrip("+#!?"))
+    if match and match.group(5) in (None, "Q", "=Q"):
+        letter, from_file, from_rank, target = match.group(1, 2, 3, 4)
+        piece = FEN_PIECES[letter.lower()] if letter else "pawn"
+        to_square = (8 - int(target[1]), "abcdefgh".index(target[0]))
+        candidates = [move for move in legal_moves
+                      if move[1] == to_square and board[move[0][0]][move[0][1]][2:] == piece
+                      and (from_file is None or move[0][1] == "abcdefgh".index(from_file))
+                      and (from_rank is None or move[0][0] == 8 - int(from_rank))]
+        if len(candidates) == 1:
+            return candidates[0]
+    try:
+        move = move_from_uci(text)
+    except ValueError:
+        move = None
+    if move in legal_moves:
+        return move
+    raise ValueError(f"Illegal or unknown move: {text}")
 
 board_state = [
     ["b_rook", "b_knight", "b_bishop", "b_queen", "b_king", "b_bishop", "b_knight", "b_rook"],
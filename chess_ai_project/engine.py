@@ -0,0 +1,134 @@
+import argparse
+import sys
+import time
+from .ai_configs import HEURISTICS
+from .board import board_from_fen, board_to_fen, move_to_uci
+from .minimax import iterative_deepening, SearchControl, SearchStats, MAX_SEARCH_DEPTH, SEARCH_FEATURES
+from .move_ordering import MoveOrderer
+from .tablebase import load_tablebases
+from .transposition import TranspositionTable, DEFAULT_MEGABYTES
+
+DEFAULT_DEPTH = 4
+
+
+class SearchLimits:
+    def __init__(self, depth=None, time_limit=None, nodes=None):
+        # With no limit at all the search stops at DEFAULT_DEPTH.
+        if depth is None and time_limit is None and nodes is None:
+            depth = DEFAULT_DEPTH
+        self.depth = depth
+        self.time_limit = time_limit
+        self.nodes = nodes
+
+
+class SearchResult:
+    def __init__(self, move, score, depth, nodes, elapsed, pv=None, stats=None):
+        self.move = move
+        self.score = score
+        self.depth = depth
+        self.nodes = nodes
+        self.elapsed = elapsed
+        self.pv = pv or []
+        # A SearchStats when the engine collects them, otherwise None.
+        self.stats = stats
+
+    def __repr__(self):
+        move = move_to_uci(self.move) if self.move else None
+        return f"SearchResult(move={move}, score={self.score}, depth={self.depth}, nodes={self.nodes})"
+
+
+def parse_position(position):
+    if isinstance(position, str):
+        return board_from_fen(position)
+    board, player = position
+    return [row[:] for row in board], player
+
+
+class Engine:
+    def __init__(self, heuristic="combined", use_symmetry=False, tt_megabytes=DEFAULT_MEGABYTES, tablebase=None,
+                 disabled=(), collect_stats=False, stats_log=None):
+        # disabled names SEARCH_FEATURES to switch off, for comparisons.
+        # With collect_stats or a stats_log path every search fills in a
+        # SearchStats; stats_log gets one JSON line per search.
+        self.evaluate_func = HEURISTICS[heuristic]
+        self.use_symmetry = use_symmetry
+        self.tablebase = tablebase
+        self.features = {feature: feature not in disabled for feature in SEARCH_FEATURES}
+        self.collect_stats = collect_stats or stats_log is not None
+        self.stats_log = stats_log
+        self.tt = TranspositionTable(tt_megabytes)
+        self.tt_owner = None
+        self.orderer = MoveOrderer()
+        self.control = None
+
+    def new_game(self):
+        self.tt.clear()
+        self.tt_owner = None
+        self.orderer = MoveOrderer()
+
+    def search(self, position, limits=None, on_iteration=None, control=None):
+        # position is a FEN string or a (board, player) pair; the score is
+        # from the point of view of the side to move. on_iteration, if given,
+        # is called as on_iteration(depth, score, move, control) after each
+        # completed depth. Passing control lets another thread stop a search
+        # that is still being set up.
+        board, player = parse_position(position)
+        limits = limits or SearchLimits()
+        if control is None:
+            control = SearchControl(limits.time_limit, limits.nodes)
+        self.control = control
+        # Stored scores are measured from the searching side's point of
+        # view, so the table is only kept while the same side searches.
+        if self.tt_owner != (player, self.evaluate_func):
+            self.tt.clear()
+            self.tt_owner = (player, self.evaluate_func)
+        stats = SearchStats() if self.collect_stats else None
+        start_time = time.perf_counter()
+        score, move, depth = iterative_deepening(board, player, self.evaluate_func, self.use_symmetry,
+                                                 max_depth=limits.depth or MAX_SEARCH_DEPTH, tt=self.tt,
+                                                 control=control, orderer=self.orderer, on_iteration=on_iteration,
+                                                 tablebase=self.tablebase, stats=stats, **self.features)
+        if self.stats_log is not None:
+            stats.append_jsonl(self.stats_log, fen=board_to_fen(board, player),
+                               move=move_to_uci(move) if move else None, score=score)
+        return SearchResult(move, score, depth, control.nodes, time.perf_counter() - start_time, control.pv, stats)
+
+    def stop(self):
+        if self.control is not None:
+            self.control.stop()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Search a position without the pygame front end.")
+    parser.add_argument("--fen", default="rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w",
+                        help="position to search (piece placement and side to move)")
+    parser.add_argument("--depth", type=int, help="maximum search depth")
+    parser.add_argument("--movetime", type=float, help="time limit in seconds")
+    parser.add_argument("--nodes", type=int, help="node limit")
+    parser.add_argument("--heuristic", choices=sorted(HEURISTICS), default="combined")
+    parser.add_argument("--symmetry", action="store_true", help="search with symmetry reduction")
+    parser.add_argument("--tablebases", metavar="DIR", help="probe endgame tablebases from this directory")
+    parser.add_argument("--disable", action="append", choices=SEARCH_FEATURES, default=[],
+                        help="switch off a search feature")
+    parser.add_argument("--stats", action="store_true", help="print search statistics")
+    parser.add_argument("--stats-log", metavar="PATH", help="append search statistics to this JSONL file")
+    args = parser.parse_args(argv)
+
+    tablebase = load_tablebases(args.tablebases) if args.tablebases else None
+    engine = Engine(args.heuristic, args.symmetry, tablebase=tablebase, disabled=args.disable,
+                    collect_stats=args.stats, stats_log=args.stats_log)
+    result = engine.search(args.fen, SearchLimits(args.depth, args.movetime, args.nodes))
+    if result.move is None:
+        print("bestmove (none)")
+        return 1
+    print(f"bestmove {move_to_uci(result.move)} score {result.score} depth {result.depth} "
+          f"nodes {result.nodes} time {result.elapsed:.3f}s")
+    if result.pv:
+        print("pv " + " ".join(move_to_uci(move) for move in result.pv))
+    if args.stats:
+        print("stats " + result.stats.summary())
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,141 @@
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from .ai_configs import HEURISTICS
+from .board import board_from_fen, move_from_san, move_to_san
+from .engine import Engine, SearchLimits
+from .minimax import SEARCH_FEATURES
+
+
+def parse_epd_line(line):
+    tokens = line.split()
+    # Four position fields as in FEN; castling and en passant are read and
+    # ignored since the engine supports neither.
+    fen = " ".join(tokens[:2])
+    operations = {}
+    for operation in " ".join(tokens[4:]).split(";"):
+        operation = operation.strip()
+        if not operation:
+            continue
+        opcode, _, operands = operation.partition(" ")
+        operations[opcode] = operands.strip().strip('"')
+    return fen, operations
+
+
+def read_epd(path):
+    records = []
+    with open(path) as f:
+        for number, line in enumerate(f, 1):
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            fen, operations = parse_epd_line(line)
+            record = {
+                "id": operations.get("id", f"{os.path.basename(path)}:{number}"),
+                "fen": fen,
+                "best_moves": operations.get("bm", "").split(),
+                "avoid_moves": operations.get("am", "").split(),
+            }
+            board, player = board_from_fen(fen)
+            for text in record["best_moves"] + record["avoid_moves"]:
+                try:
+                    move_from_san(board, player, text)
+                except ValueError as error:
+                    raise ValueError(f"{path}:{number}: {error}") from None
+            records.append(record)
+    return records
+
+
+def is_solution(board, player, move, record):
+    best_moves = [move_from_san(board, player, text) for text in record["best_moves"]]
+    avoid_moves = [move_from_san(board, player, text) for text in record["avoid_moves"]]
+    if best_moves and move not in best_moves:
+        return False
+    return move not in avoid_moves
+
+
+def solve_position(record, depth, time_limit, heuristic, disabled=()):
+    board, player = board_from_fen(record["fen"])
+    solved_since = []
+
+    def track(depth_done, score, move, control):
+        # Time to solution is when the engine settled on a correct move for
+        # good, so a correct pick that is later abandoned does not count.
+        if move is not None and is_solution(board, player, move, record):
+            if not solved_since:
+                solved_since.append(control.elapsed())
+        else:
+            solved_since.clear()
+
+    result = Engine(heuristic, disabled=disabled).search((board, player), SearchLimits(depth, time_limit), track)
+    solved = result.move is not None and is_solution(board, player, result.move, record)
+    return {
+        "id": record["id"],
+        "move": move_to_san(board, player, result.move) if result.move else None,
+        "solved": solved,
+        "time_to_solution": solved_since[0] if solved and solved_since else None,
+        "time": result.elapsed,
+        "nodes": result.nodes,
+        "depth": result.depth,
+    }
+
+
+def run_suite(records, depth=None, time_limit=None, heuristic="combined", workers=None, disabled=()):
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = [executor.submit(solve_position, record, depth, time_limit, heuristic, disabled)
+                   for record in records]
+        return [future.result() for future in futures]
+
+
+def summarize(results, wall_time):
+    solved = [result for result in results if result["solved"]]
+    search_time = sum(result["time"] for result in results)
+    times_to_solution = [result["time_to_solution"] for result in solved]
+    return {
+        "positions": len(results),
+        "solved": len(solved),
+        "solve_rate": len(solved) / len(results) if results else 0.0,
+        "mean_time_to_solution": sum(times_to_solution) / len(times_to_solution) if times_to_solution else None,
+        "search_time": search_time,
+        "wall_time": wall_time,
+        "solved_per_search_second": len(solved) / search_time if search_time else 0.0,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run an EPD test suite (bm/am operations) through the engine.")
+    parser.add_argument("path", help="EPD file")
+    parser.add_argument("--depth", type=int, help="search depth per position")
+    parser.add_argument("--movetime", type=float, help="seconds per position")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: all cores)")
+    parser.add_argument("--heuristic", choices=sorted(HEURISTICS), default="combined")
+    parser.add_argument("--disable", action="append", choices=SEARCH_FEATURES, default=[],
+                        help="switch off a search feature")
+    args = parser.parse_args(argv)
+    if args.depth is None and args.movetime is None:
+        args.movetime = 1.0
+
+    records = read_epd(args.path)
+    start_time = time.perf_counter()
+    results = run_suite(records, args.depth, args.movetime, args.heuristic, args.workers,
+                        args.disable)
+    summary = summarize(results, time.perf_counter() - start_time)
+
+    for record, result in zip(records, results):
+        expected = " ".join(record["best_moves"]) or "not " + " ".join(record["avoid_moves"])
+        solution_time = f"{result['time_to_solution']:.3f}s" if result["time_to_solution"] is not None else "-"
+        print(f"{'ok  ' if result['solved'] else 'FAIL'} {result['id']:24s} {result['move'] or '-':8s} "
+              f"expected {expected:12s} depth {result['depth']:2d} solved after {solution_time}")
+    mean_time = summary["mean_time_to_solution"]
+    print(f"solved {summary['solved']}/{summary['positions']} ({summary['solve_rate']:.0%}), "
+          f"mean time to solution {mean_time:.3f}s" if mean_time is not None else
+          f"solved {summary['solved']}/{summary['positions']} ({summary['solve_rate']:.0%})")
+    print(f"search time {summary['search_time']:.2f}s, wall time {summary['wall_time']:.2f}s, "
+          f"{summary['solved_per_search_second']:.2f} solved per search second")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,18 +1,36 @@
 import pygame
 import sys
 import os
-import time
-from pieces import load_piece_images, PIECE_IMAGES
-from board import generate_moves, make_move, is_valid_move, is_checkmate, is_stalemate, is_in_check, board_state as initial_board_state
-from minimax import minimax, minimax_no_ab, evaluate_board_material, evaluate_board_pst, evaluate_board_combined, simple_heuristic_ai, pure_symmetry_reduction_ai
-from symmetry_reducer import reduce_symmetry
-import random
+
+if not __package__:
+    # Started as "python main.py"; import the engine modules as the package
+    # they belong to (PEP 366).
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    import chess_ai_project
+    __package__ = "chess_ai_project"
+
+from .pieces import load_piece_images, PIECE_IMAGES
+from .board import generate_moves, make_move, is_valid_move, is_in_check, position_status, board_state as initial_board_state
+from .bitboard import CHECKMATE, STALEMATE
+from .ai_configs import MENU_OPTIONS, resolve_config
+from .transposition import TranspositionTable
+from .ai_worker import AISearchWorker
+from .minimax import SearchStats
+from .opening_book import load_opening_book
+from .tablebase import load_tablebases
 
 pygame.init()
 pygame.mixer.init()
 
 WIDTH, HEIGHT = 1280, 721
 ROWS, COLS = 8, 8
+AI_TIME_LIMIT = 2.0
+# Search statistics: shown under the response time and/or appended as JSON
+# lines to SEARCH_STATS_LOG. Nothing is collected when both are off.
+SHOW_SEARCH_STATS = False
+SEARCH_STATS_LOG = None
+# Search the position after the AI's expected reply while the player thinks.
+AI_PONDER = True
 SQUARE_SIZE = min(WIDTH, HEIGHT) // COLS
 
 WIN = pygame.display.set_mode((WIDTH, HEIGHT))
@@ -34,7 +52,10 @@ GAME_OVER = 3
 
 current_state = START_MENU
 
-ASSETS_DIR = "assets"
+GAME_DIR = os.path.dirname(os.path.abspath(__file__))
+ASSETS_DIR = os.path.join(GAME_DIR, "assets")
+OPENING_BOOK_PATH = os.path.join(GAME_DIR, "books", "opening_book.bin")
+TABLEBASE_DIRECTORY = os.path.join(GAME_DIR, "tablebases")
 COVER1_PATH = os.path.join(ASSETS_DIR, "cover1.png")
 COVER2_PATH = os.path.join(ASSETS_DIR, "cover2.png")
 BACKGROUND_MUSIC_PATH = os.path.join(ASSETS_DIR, "background.wav")
@@ -92,6 +113,14 @@ ai_algorithm_func = None
 ai_heuristic_func = None
 ai_use_symmetry = False
 ai_response_time = 0.0
+ai_search_depth = 0
+ai_move_source = None
+ai_ponder_hit = False
+ai_search_stats = None
+ai_transposition_table = TranspositionTable()
+ai_search = AISearchWorker()
+ai_opening_book = load_opening_book(OPENING_BOOK_PATH)
+ai_tablebase = load_tablebases(TABLEBASE_DIRECTORY)
 
 font = pygame.font.SysFont('Arial', 40)
 button_font = pygame.font.SysFont('Arial', 30)
@@ -129,24 +158,14 @@ def create_main_menu_buttons():
     button_width = 600
     button_height = 60
     spacing = 15
-    options = [
-        ("Minimax (No Alpha-Beta, Material)", {"algorithm": "minimax_no_ab", "heuristic": "material", "symmetry": False}),
-        ("Minimax with Alpha-Beta (Material)", {"algorithm": "minimax_ab", "heuristic": "material", "symmetry": False}),
-        ("Heuristic (Material Balance)", {"algorithm": "greedy", "heuristic": "material", "symmetry": False}),
-        ("Heuristic (Piece-Square Tables)", {"algorithm": "greedy", "heuristic": "pst", "symmetry": False}),
-        ("Minimax (Alpha-Beta, PST)", {"algorithm": "minimax_ab", "heuristic": "pst", "symmetry": False}),
-        ("Minimax (Alpha-Beta, Combined Heuristics)", {"algorithm": "minimax_ab", "heuristic": "combined", "symmetry": False}),
-        ("Symmetry Reduction Only (Pure)", {"algorithm": "pure_symmetry", "heuristic": None, "symmetry": True}),
-        ("Heuristic Reduction (Greedy Material + Symmetry)", {"algorithm": "greedy", "heuristic": "material", "symmetry": True}),
-    ]
-
-    total_buttons = len(options)
+
+    total_buttons = len(MENU_OPTIONS)
     total_height = total_buttons * button_height + (total_buttons - 1) * spacing
     start_y = (HEIGHT - total_height) // 2
     center_x = WIDTH // 2
 
     main_menu_buttons = []
-    for i, (text, action_params) in enumerate(options):
+    for i, (text, action_params) in enumerate(MENU_OPTIONS):
         y = start_y + i * (button_height + spacing)
         x = center_x - button_width // 2
         main_menu_buttons.append(Button(text, x, y, button_width, button_height, GRAY, WHITE, action=action_params))
@@ -193,6 +212,16 @@ def draw_valid_moves(win, valid_moves):
         win.blit(s, (col * SQUARE_SIZE, row * SQUARE_SIZE))
 
 
+def new_search_stats():
+    return SearchStats() if SHOW_SEARCH_STATS or SEARCH_STATS_LOG else None
+
+
+def draw_thinking_indicator(win, depth, nodes):
+    dots = "." * (pygame.time.get_ticks() // 400 % 4)
+    thinking_text = timer_font.render(f"AI thinking{dots}  depth {depth}, {nodes} nodes", True, WHITE)
+    win.blit(thinking_text, (10, 40))
+
+
 def display_game_over(win, message):
     font = pygame.font.SysFont('Arial', 40)
     text = font.render(message, True, WHITE)
@@ -215,6 +244,7 @@ def display_game_over(win, message):
     while waiting:
         for event in pygame.event.get():
             if event.type == pygame.QUIT:
+                ai_search.shutdown()
                 pygame.quit()
                 sys.exit()
             if event.type == pygame.MOUSEBUTTONDOWN:
@@ -222,7 +252,7 @@ def display_game_over(win, message):
 
 
 def reset_game():
-    global board_state, player_turn, selected_piece, valid_moves_for_selected, dragging, game_over, result_message, last_ai_move, ai_response_time
+    global board_state, player_turn, selected_piece, valid_moves_for_selected, dragging, game_over, result_message, last_ai_move, ai_response_time, ai_search_depth, ai_move_source, ai_ponder_hit, ai_search_stats, ai_transposition_table
     board_state = [row[:] for row in initial_board_state]
     player_turn = "w"
     selected_piece = None
@@ -232,6 +262,12 @@ def reset_game():
     result_message = ""
     last_ai_move = None
     ai_response_time = 0.0
+    ai_search_depth = 0
+    ai_move_source = None
+    ai_ponder_hit = False
+    ai_search_stats = None
+    ai_transposition_table = TranspositionTable()
+    ai_search.cancel()
 
 
 def handle_start_menu_click(pos):
@@ -243,6 +279,7 @@ def handle_start_menu_click(pos):
     elif exit_button.is_clicked(pos):
         if click_sound:
             click_sound.play()
+        ai_search.shutdown()
         pygame.quit()
         sys.exit()
 
@@ -254,29 +291,7 @@ def handle_main_menu_click(pos):
                 click_sound.play()
             action_params = button.action
 
-            ai_type = action_params.get("algorithm")
-            heuristic_type = action_params.get("heuristic")
-            ai_use_symmetry = action_params.get("symmetry", False)
-
-            if ai_type == "minimax_ab":
-                ai_algorithm_func = minimax
-            elif ai_type == "minimax_no_ab":
-                 ai_algorithm_func = minimax_no_ab
-            elif ai_type == "greedy":
-                ai_algorithm_func = simple_heuristic_ai
-            elif ai_type == "pure_symmetry":
-                 ai_algorithm_func = pure_symmetry_reduction_ai
-            else:
-                ai_algorithm_func = minimax
-
-            if heuristic_type == "material":
-                ai_heuristic_func = evaluate_board_material
-            elif heuristic_type == "pst":
-                ai_heuristic_func = evaluate_board_pst
-            elif heuristic_type == "combined":
-                 ai_heuristic_func = evaluate_board_combined
-            else:
-                 ai_heuristic_func = None
+            ai_algorithm_func, ai_heuristic_func, ai_use_symmetry = resolve_config(action_params)
 
             reset_game()
             ai_response_time = 0.0
@@ -286,7 +301,7 @@ def handle_main_menu_click(pos):
 
 
 def game_loop():
-    global selected_piece, valid_moves_for_selected, player_turn, board_state, dragging, game_over, result_message, last_ai_move, current_state, ai_algorithm_func, ai_heuristic_func, ai_use_symmetry, ai_response_time
+    global selected_piece, valid_moves_for_selected, player_turn, board_state, dragging, game_over, result_message, last_ai_move, current_state, ai_algorithm_func, ai_heuristic_func, ai_use_symmetry, ai_response_time, ai_search_depth, ai_move_source, ai_ponder_hit, ai_search_stats
 
     clock = pygame.time.Clock()
     load_piece_images(SQUARE_SIZE)
@@ -332,16 +347,21 @@ def game_loop():
                                     if click_sound:
                                         click_sound.play()
                                     board_state = make_move(board_state, move)
-                                    if is_checkmate(board_state, "b"):
+                                    status = position_status(board_state, "b")
+                                    if status == CHECKMATE:
                                         game_over = True
                                         result_message = "You Win! Checkmate."
                                         if win_sound:
                                             win_sound.play()
-                                    elif is_stalemate(board_state, "b"):
+                                    elif status == STALEMATE:
                                         game_over = True
                                         result_message = "Draw! Stalemate."
                                     else:
                                         player_turn = "b"
+                                    if game_over:
+                                        ai_search.cancel()
+                                    else:
+                                        ai_ponder_hit = ai_search.ponder_hit(move)
                                 else:
                                     selected_piece = None
                                     valid_moves_for_selected = []
@@ -383,56 +403,67 @@ def game_loop():
                         background_music.play(-1)
 
             if not game_over and player_turn == "b" and ai_algorithm_func:
-                pygame.display.update()
-
-                start_time = time.time()
-
-                if ai_algorithm_func == minimax:
-                    ai_move_eval, ai_move = ai_algorithm_func(board_state, depth=3, alpha=float('-inf'), beta=float('inf'), maximizing_player=True, player="b", evaluate_func=ai_heuristic_func, use_symmetry=ai_use_symmetry)
-                elif ai_algorithm_func == minimax_no_ab:
-                     ai_move_eval, ai_move = ai_algorithm_func(board_state, depth=3, maximizing_player=True, player="b", evaluate_func=ai_heuristic_func, use_symmetry=ai_use_symmetry)
-                elif ai_algorithm_func == simple_heuristic_ai:
-                    ai_move = ai_algorithm_func(board_state, player="b", evaluate_func=ai_heuristic_func, use_symmetry=ai_use_symmetry)
-                elif ai_algorithm_func == pure_symmetry_reduction_ai:
-                     ai_move = ai_algorithm_func(board_state, player="b", use_symmetry=ai_use_symmetry)
-                else:
-                    ai_move = None
-
-                end_time = time.time()
-                ai_response_time = end_time - start_time
-
-                if ai_move:
-                    last_ai_move = ai_move
-                    board_state = make_move(board_state, ai_move)
-                    if click_sound:
-                        click_sound.play()
-                    if is_checkmate(board_state, "w"):
-                        game_over = True
-                        result_message = "AI Wins! Checkmate."
-                        if lose_sound:
-                            lose_sound.play()
-                    elif is_stalemate(board_state, "w"):
-                        game_over = True
-                        result_message = "Draw! Stalemate."
+                if not ai_search.is_started():
+                    ai_search.start(board_state, "b", ai_algorithm_func, ai_heuristic_func, ai_use_symmetry, AI_TIME_LIMIT, ai_transposition_table, ai_opening_book,
+                                    ai_tablebase, new_search_stats())
+
+                if ai_search.is_done():
+                    ai_move, ai_response_time, ai_search_depth, ai_move_source = ai_search.result()
+                    ai_search_stats = ai_search.stats
+                    if ai_move_source or not ai_search_depth:
+                        ai_search_stats = None
+                    if ai_search_stats is not None and SEARCH_STATS_LOG:
+                        ai_search_stats.append_jsonl(SEARCH_STATS_LOG, move=ai_move, response_time=ai_response_time)
+
+                    if ai_move:
+                        last_ai_move = ai_move
+                        board_state = make_move(board_state, ai_move)
+                        if click_sound:
+                            click_sound.play()
+                        status = position_status(board_state, "w")
+                        if status == CHECKMATE:
+                            game_over = True
+                            result_message = "AI Wins! Checkmate."
+                            if lose_sound:
+                                lose_sound.play()
+                        elif status == STALEMATE:
+                            game_over = True
+                            result_message = "Draw! Stalemate."
+                        else:
+                            player_turn = "w"
+                            if AI_PONDER:
+                                ai_search.ponder(board_state, "w", ai_algorithm_func, ai_heuristic_func, ai_use_symmetry, AI_TIME_LIMIT, ai_transposition_table,
+                                                 ai_opening_book, ai_tablebase, new_search_stats())
                     else:
-                        player_turn = "w"
+                        if is_in_check(board_state, "b"):
+                            game_over = True
+                            result_message = "You Win! Checkmate."
+                            if win_sound:
+                                win_sound.play()
+                        else:
+                            game_over = True
+                            result_message = "Draw! Stalemate."
                 else:
-                    if is_in_check(board_state, "b"):
-                        game_over = True
-                        result_message = "You Win! Checkmate."
-                        if win_sound:
-                            win_sound.play()
-                    else:
-                        game_over = True
-                        result_message = "Draw! Stalemate."
+                    draw_thinking_indicator(WIN, *ai_search.progress())
 
             if ai_response_time > 0:
-                timer_text = timer_font.render(f"AI Response Time: {ai_response_time:.4f} seconds", True, WHITE)
+                timer_label = f"AI Response Time: {ai_response_time:.4f} seconds"
+                if ai_move_source:
+                    timer_label += f" ({ai_move_source})"
+                elif ai_search_depth and ai_ponder_hit:
+                    timer_label += f" (depth {ai_search_depth}, ponder hit)"
+                elif ai_search_depth:
+                    timer_label += f" (depth {ai_search_depth})"
+                timer_text = timer_font.render(timer_label, True, WHITE)
                 WIN.blit(timer_text, (10, 10))
+                if SHOW_SEARCH_STATS and ai_search_stats is not None and player_turn == "w":
+                    stats_text = timer_font.render(ai_search_stats.summary(), True, WHITE)
+                    WIN.blit(stats_text, (10, 40))
 
 
         pygame.display.update()
 
+    ai_search.shutdown()
     pygame.quit()
     sys.exit()
 
@@ -1,220 +1,671 @@
-from board import generate_moves, make_move, is_checkmate, is_stalemate, is_in_check
-from symmetry_reducer import reduce_symmetry
+from .board import generate_moves
+from .bitboard import from_board, to_board, decode_move, CHECK, CHECKMATE, STALEMATE, color_index, CODE_MATERIAL, CODE_SQUARE_PST, PAWN, QUEEN, KING
+from . import bitboard
+from .symmetry_reducer import reduce_symmetry, reduce_encoded_symmetry, MIRROR_FILES, MIRROR_SQUARE
+from .transposition import TranspositionTable, EXACT, LOWER_BOUND, UPPER_BOUND
+from .move_ordering import MoveOrderer, is_quiet, is_promotion
+import json
 import random
+import time
+from .tablebase import distance_score
 
-def evaluate_board_material(board, player):
-    piece_values = {
-        "pawn": 10,
-        "knight": 30,
-        "bishop": 30,
-        "rook": 50,
-        "queen": 90,
-        "king": 1000
-    }
-
-    score = 0
+def node_statuses(pos, player):
+    # Stalemate only ever ends the game for the searching player, so the
+    # opponent's legal moves are only examined when it is in check.
     opponent = 'w' if player == 'b' else 'b'
+    return bitboard.position_status(pos, player), bitboard.position_status(pos, opponent, detect_stalemate=False)
 
-    for row in range(8):
-        for col in range(8):
-            piece = board[row][col]
-            if piece:
-                color, ptype = piece.split("_")
-                value = piece_values.get(ptype, 0)
-
-                if color == player:
-                    score += value
-                else:
-                    score -= value
 
-    if is_checkmate(board, opponent):
+def _terminal_bonus(statuses):
+    player_status, opponent_status = statuses
+    score = 0
+    if opponent_status == CHECKMATE:
         score += 10000
-    elif is_checkmate(board, player):
+    elif player_status == CHECKMATE:
         score -= 10000
 
-    if is_in_check(board, opponent):
-         score += 50
-
+    if opponent_status == CHECK or opponent_status == CHECKMATE:
+        score += 50
     return score
 
-def evaluate_board_pst(board, player):
-    pawn_pst = [
-        [0, 0, 0, 0, 0, 0, 0, 0],
-        [5, 10, 10, -20, -20, 10, 10, 5],
-        [5, -5, -10, 0, 0, -10, -5, 5],
-        [0, 0, 0, 20, 20, 0, 0, 0],
-        [5, 5, 10, 25, 25, 10, 5, 5],
-        [10, 10, 20, 30, 30, 20, 10, 10],
-        [50, 50, 50, 50, 50, 50, 50, 50],
-        [0, 0, 0, 0, 0, 0, 0, 0]
-    ]
-
-    knight_pst = [
-        [-50, -40, -30, -30, -30, -30, -40, -50],
-        [-40, -20, 0, 5, 5, 0, -20, -40],
-        [-30, 5, 10, 15, 15, 10, 5, -30],
-        [-30, 0, 15, 20, 20, 15, 0, -30],
-        [-30, 5, 15, 20, 20, 15, 5, -30],
-        [-30, 0, 10, 15, 15, 10, 0, -30],
-        [-40, -20, 0, 0, 0, 0, -20, -40],
-        [-50, -40, -30, -30, -30, -30, -30, -40, -50]
-    ]
-
-    bishop_pst = [
-        [-20, -10, -10, -10, -10, -10, -10, -20],
-        [-10, 5, 0, 0, 0, 0, 5, -10],
-        [-10, 10, 10, 10, 10, 10, 10, -10],
-        [-10, 0, 10, 10, 10, 10, 0, -10],
-        [-10, 5, 5, 10, 10, 5, 5, -10],
-        [-10, 0, 5, 10, 10, 5, 0, -10],
-        [-10, 0, 0, 0, 0, 0, 0, -10],
-        [-20, -10, -10, -10, -10, -10, -10, -20]
-    ]
-
-    rook_pst = [
-        [0, 0, 0, 5, 5, 0, 0, 0],
-        [-5, 0, 0, 0, 0, 0, 0, -5],
-        [-5, 0, 0, 0, 0, 0, 0, -5],
-        [-5, 0, 0, 0, 0, 0, 0, -5],
-        [-5, 0, 0, 0, 0, 0, 0, -5],
-        [-5, 0, 0, 0, 0, 0, 0, -5],
-        [5, 10, 10, 10, 10, 10, 10, 5],
-        [0, 0, 0, 0, 0, 0, 0, 0]
-    ]
-
-    queen_pst = [
-        [-20, -10, -10, -5, -5, -10, -10, -20],
-        [-10, 0, 0, 0, 0, 0, 0, -10],
-        [-10, 0, 5, 5, 5, 5, 0, -10],
-        [-5, 0, 5, 5, 5, 5, 0, -5],
-        [0, 0, 5, 5, 5, 5, 0, -5],
-        [-10, 5, 5, 5, 5, 5, 0, -10],
-        [-10, 0, 5, 0, 0, 0, 0, -10],
-        [-20, -10, -10, -5, -5, -10, -10, -20]
-    ]
-
-    king_pst_middle_game = [
-        [-30, -40, -40, -50, -50, -40, -40, -30],
-        [-30, -40, -40, -50, -50, -40, -40, -30],
-        [-30, -40, -40, -50, -50, -40, -40, -30],
-        [-30, -40, -40, -50, -50, -40, -40, -30],
-        [-20, -30, -30, -40, -40, -30, -30, -20],
-        [-10, -20, -20, -20, -20, -20, -20, -10],
-        [20, 20, 0, 0, 0, 0, 20, 20],
-        [20, 30, 10, 0, 0, 10, 30, 20]
-    ]
-
-    pst_values = {
-        "pawn": pawn_pst,
-        "knight": knight_pst,
-        "bishop": bishop_pst,
-        "rook": rook_pst,
-        "queen": queen_pst,
-        "king": king_pst_middle_game
-    }
 
-    score = 0
-    opponent = 'w' if player == 'b' else 'b'
+# The piece-square tables only score a position and its file mirror alike
+# when every table is left-right symmetric (the queen table is not).
+PST_MIRROR_SYMMETRIC = all(table[sq] == table[sq ^ MIRROR_SQUARE] for table in CODE_SQUARE_PST for sq in range(64))
 
-    for row in range(8):
-        for col in range(8):
-            piece = board[row][col]
-            if piece:
-                color, ptype = piece.split("_")
-                pst_table = pst_values.get(ptype)
 
-                if pst_table:
-                    r = row if color == 'w' else 7 - row
-                    c = col
+class IncrementalEvaluator:
+    # Scores a position from the running material and piece-square balances
+    # kept by Position. Each enabled term carries its own copy of the
+    # mate/check bonus, as the original combined heuristic did.
+    def __init__(self, material_weight, pst_weight):
+        self.material_weight = material_weight
+        self.pst_weight = pst_weight
+        self.bonus_weight = material_weight + pst_weight
+        self.mirror_symmetric = pst_weight == 0 or PST_MIRROR_SYMMETRIC
 
-                    if color == player:
-                        score += pst_table[r][c]
-                    else:
-                        score -= pst_table[r][c]
+    def balance(self, pos, player):
+        balance = self.material_weight * pos.material + self.pst_weight * pos.pst
+        return balance if player == 'w' else -balance
 
-    if is_checkmate(board, opponent):
-        score += 10000
-    elif is_checkmate(board, player):
-        score -= 10000
+    def __call__(self, pos, player, statuses=None):
+        if statuses is None:
+            statuses = node_statuses(pos, player)
+        return self.balance(pos, player) + self.bonus_weight * _terminal_bonus(statuses)
 
-    if is_in_check(board, opponent):
-         score += 50
 
-    return score
+evaluate_position_material = IncrementalEvaluator(material_weight=1, pst_weight=0)
+evaluate_position_pst = IncrementalEvaluator(material_weight=0, pst_weight=1)
+evaluate_position_combined = IncrementalEvaluator(material_weight=1, pst_weight=1)
 
-def evaluate_board_combined(board, player):
-    material_score = evaluate_board_material(board, player)
-    pst_score = evaluate_board_pst(board, player)
-    return material_score + pst_score
 
-def minimax(board, depth, alpha, beta, maximizing_player, player, evaluate_func, use_symmetry=False):
-    opponent = 'w' if player == 'b' else 'b'
+def evaluate_board_material(board, player):
+    return evaluate_position_material(from_board(board), player)
+
+
+def evaluate_board_pst(board, player):
+    return evaluate_position_pst(from_board(board), player)
+
+
+def evaluate_board_combined(board, player):
+    return evaluate_position_combined(from_board(board), player)
+
+
+POSITION_EVALUATORS = {
+    evaluate_board_material: evaluate_position_material,
+    evaluate_board_pst: evaluate_position_pst,
+    evaluate_board_combined: evaluate_position_combined,
+}
+
+
+def position_evaluator(evaluate_func):
+    if evaluate_func in POSITION_EVALUATORS:
+        return POSITION_EVALUATORS[evaluate_func]
+    return lambda pos, player, statuses=None: evaluate_func(to_board(pos), player)
+
+
+MAX_SEARCH_DEPTH = 32
+
+# Delta pruning skips a capture when even winning the captured piece, plus
+# this margin for piece-square swings and the check bonus, cannot reach the
+# bound. Promotions count as winning a queen.
+DELTA_MARGIN = 200
+CAPTURE_GAINS = [abs(value) for value in CODE_MATERIAL] + [0]
+PROMOTION_GAIN = CAPTURE_GAINS[QUEEN] - CAPTURE_GAINS[PAWN]
+
+# Selective search. The null-move search is NULL_MOVE_REDUCTION plies
+# shallower than a normal reply; late move reductions take one ply off quiet
+# moves after the first LMR_FULL_MOVES; FUTILITY_MARGIN covers the largest
+# piece-square gain of a quiet move plus the check bonus.
+NULL_MOVE_REDUCTION = 2
+NULL_MOVE_MIN_DEPTH = 3
+LMR_FULL_MOVES = 3
+LMR_MIN_DEPTH = 3
+FUTILITY_MARGIN = 80
+
+# Aspiration windows start this far either side of the previous iteration's
+# score and grow by ASPIRATION_GROWTH on every fail, up to ASPIRATION_LIMIT
+# before opening fully.
+ASPIRATION_WINDOW = 25
+ASPIRATION_GROWTH = 4
+ASPIRATION_LIMIT = 2000
+ASPIRATION_MIN_DEPTH = 3
+
+# Keyword switches shared by minimax, iterative_deepening and SearchContext.
+SEARCH_FEATURES = ["quiescence", "null_move", "lmr", "futility", "pvs", "aspiration", "mirror"]
+NODE_CHECK_INTERVAL = 256
+
+
+class SearchAborted(Exception):
+    pass
+
+
+class SearchControl:
+    def __init__(self, time_limit=None, max_nodes=None):
+        self.start_time = time.perf_counter()
+        self.time_limit = time_limit
+        self.deadline = self.start_time + time_limit if time_limit is not None else None
+        self.max_nodes = max_nodes
+        self.nodes = 0
+        self.depth = 0
+        self.pv = []
+        self.stopped = False
+        self.next_check = self._next_check()
+
+    def _next_check(self):
+        next_check = self.nodes + NODE_CHECK_INTERVAL
+        if self.max_nodes is not None:
+            next_check = min(next_check, self.max_nodes)
+        return next_check
+
+    def stop(self):
+        self.stopped = True
+
+    def set_time_limit(self, time_limit, from_now=False):
+        # Puts a search started without a clock (pondering) on one. Time
+        # already spent counts against the limit unless from_now restarts
+        # the clock.
+        if from_now:
+            self.start_time = time.perf_counter()
+        self.time_limit = time_limit
+        self.deadline = self.start_time + time_limit if time_limit is not None else None
+
+    def elapsed(self):
+        return time.perf_counter() - self.start_time
+
+    def check(self):
+        if self.stopped:
+            raise SearchAborted()
+        if self.max_nodes is not None and self.nodes >= self.max_nodes:
+            self.stopped = True
+            raise SearchAborted()
+        if self.deadline is not None and time.perf_counter() >= self.deadline:
+            self.stopped = True
+            raise SearchAborted()
+        self.next_check = self._next_check()
+
+    def can_start_iteration(self):
+        # An iteration rarely finishes in less time than all earlier ones
+        # took together, so stop once half the budget is gone.
+        if self.stopped:
+            return False
+        if self.deadline is not None and self.elapsed() * 2 >= self.time_limit:
+            return False
+        return self.max_nodes is None or self.nodes * 2 < self.max_nodes
+
+
+class SearchStats:
+    # Filled in by a search that is handed one. The search then reaches move
+    # generation, evaluation and check detection through timed wrappers;
+    # without one it calls them directly, so collecting nothing costs
+    # nothing. Each search resets the counters, so one object kept across
+    # moves always holds the latest search.
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.nodes = 0
+        self.leaf_evals = 0
+        self.movegen_calls = 0
+        self.check_calls = 0
+        self.cutoffs_by_index = []
+        self.tt_hits = 0
+        self.tt_probes = 0
+        self.depth = 0
+        self.max_depth = 0
+        self.elapsed = 0.0
+        self.movegen_time = 0.0
+        self.eval_time = 0.0
+        self.check_time = 0.0
+        self._start = None
+
+    def timed_evaluate(self, evaluate):
+        perf_counter = time.perf_counter
+
+        def timed(pos, player, statuses=None):
+            start = perf_counter()
+            score = evaluate(pos, player, statuses)
+            self.eval_time += perf_counter() - start
+            self.leaf_evals += 1
+            return score
+        return timed
+
+    def timed_generator(self, generate):
+        perf_counter = time.perf_counter
+
+        def timed(pos, player):
+            start = perf_counter()
+            moves = generate(pos, player)
+            self.movegen_time += perf_counter() - start
+            self.movegen_calls += 1
+            return moves
+        return timed
+
+    def timed_check(self, detect):
+        # Every node asks for its check status, so this is also where the
+        # deepest ply reached (quiescence included) is read off the
+        # position's move history.
+        perf_counter = time.perf_counter
+
+        def timed(pos, player):
+            start = perf_counter()
+            result = detect(pos, player)
+            self.check_time += perf_counter() - start
+            self.check_calls += 1
+            if len(pos.history) > self.max_depth:
+                self.max_depth = len(pos.history)
+            return result
+        return timed
+
+    def start(self, context):
+        self.reset()
+        orderer, tt = context.orderer, context.tt
+        self._start = (time.perf_counter(), context.control.nodes,
+                       list(orderer.cutoff_counts) if orderer is not None else [],
+                       (tt.hits, tt.hits + tt.misses) if tt is not None else (0, 0))
+
+    def finish(self, context, depth):
+        start_time, start_nodes, start_cutoffs, (start_hits, start_probes) = self._start
+        self.elapsed = time.perf_counter() - start_time
+        self.nodes = context.control.nodes - start_nodes
+        self.depth = depth
+        if context.orderer is not None:
+            counts = context.orderer.cutoff_counts
+            self.cutoffs_by_index = [count - (start_cutoffs[index] if index < len(start_cutoffs) else 0)
+                                     for index, count in enumerate(counts)]
+        tt = context.tt
+        if tt is not None:
+            self.tt_hits = tt.hits - start_hits
+            self.tt_probes = tt.hits + tt.misses - start_probes
+
+    def nps(self):
+        return self.nodes / self.elapsed if self.elapsed > 0 else 0.0
+
+    def as_dict(self):
+        cutoffs = sum(self.cutoffs_by_index)
+        return {
+            "nodes": self.nodes,
+            "leaf_evals": self.leaf_evals,
+            "movegen_calls": self.movegen_calls,
+            "check_calls": self.check_calls,
+            "cutoffs": cutoffs,
+            "first_move_cutoff_rate": self.cutoffs_by_index[0] / cutoffs if cutoffs else 0.0,
+            "cutoffs_by_index": list(self.cutoffs_by_index),
+            "tt_hits": self.tt_hits,
+            "tt_probes": self.tt_probes,
+            "depth": self.depth,
+            "max_depth": self.max_depth,
+            "elapsed": self.elapsed,
+            "nps": self.nps(),
+            "movegen_time": self.movegen_time,
+            "eval_time": self.eval_time,
+            "check_time": self.check_time,
+        }
+
+    def summary(self):
+        return (f"{self.nodes} nodes, {self.nps():.0f} nps, depth {self.depth}/{self.max_depth}, "
+                f"tt {self.tt_hits}/{self.tt_probes}, movegen {self.movegen_time:.3f}s, "
+                f"eval {self.eval_time:.3f}s, check {self.check_time:.3f}s")
+
+    def append_jsonl(self, path, **fields):
+        # One JSON object per line; fields are extra keys such as the
+        # position or the move played.
+        record = dict(fields)
+        record.update(self.as_dict())
+        with open(path, "a") as f:
+            f.write(json.dumps(record) + "\n")
+
+
+class SearchContext:
+    # Everything after orderer is keyword-only, so that adding an option
+    # cannot shift the others.
+    def __init__(self, player, evaluate_func, use_symmetry=False, tt=None, control=None, orderer=None, *,
+                 tablebase=None, quiescence=True, null_move=True, lmr=True, futility=True, pvs=True, aspiration=True,
+                 mirror=True, stats=None):
+        self.player = player
+        self.opponent = 'w' if player == 'b' else 'b'
+        # base_evaluate is the evaluator itself; evaluate may be its timed
+        # wrapper.
+        self.base_evaluate = position_evaluator(evaluate_func)
+        self.evaluate = self.base_evaluate
+        self.generate_moves = bitboard.generate_moves
+        self.generate_captures = bitboard.generate_captures
+        self.node_statuses = node_statuses
+        self.is_in_check = bitboard.is_in_check
+        self.stats = stats
+        if stats is not None:
+            self.evaluate = stats.timed_evaluate(self.evaluate)
+            self.generate_moves = stats.timed_generator(self.generate_moves)
+            self.generate_captures = stats.timed_generator(self.generate_captures)
+            self.node_statuses = stats.timed_check(self.node_statuses)
+            self.is_in_check = stats.timed_check(self.is_in_check)
+        self.use_symmetry = use_symmetry
+        self.tt = tt
+        self.control = control if control is not None else SearchControl()
+        self.orderer = orderer
+        self.quiescence = quiescence
+        self.null_move = null_move
+        self.lmr = lmr
+        self.futility = futility
+        self.pvs = pvs
+        self.aspiration = aspiration
+        self.mirror = mirror and can_share_mirrored(self.base_evaluate)
+        # Triangular PV table: pv_table[ply] holds the best line found from
+        # the node currently being searched at that ply.
+        self.pv_table = {}
+        self.tablebase = tablebase
+        self.tablebase_pieces = tablebase.max_pieces if tablebase is not None else 0
+
+    def new_search(self):
+        if self.tt is not None:
+            self.tt.new_search()
+        if self.orderer is not None:
+            self.orderer.new_search()
+
+    def start_stats(self):
+        if self.stats is not None:
+            self.stats.start(self)
+
+    def finish_stats(self, depth):
+        if self.stats is not None:
+            self.stats.finish(self, depth)
+
+
+def can_share_mirrored(evaluate):
+    # Mirrored positions can share transposition entries only if the
+    # evaluation cannot tell them apart.
+    return isinstance(evaluate, IncrementalEvaluator) and evaluate.mirror_symmetric
+
+
+def _search_result(evaluation, move):
+    return evaluation, decode_move(move) if move is not None else None
+
+
+def minimax(board, depth, alpha, beta, maximizing_player, player, evaluate_func, use_symmetry=False, tt=None, control=None, orderer=None,
+            *, tablebase=None, quiescence=True, null_move=True, lmr=True, futility=True, pvs=True, aspiration=True,
+            mirror=True, stats=None):
+    pos = from_board(board)
+    context = SearchContext(player, evaluate_func, use_symmetry,
+                            tt if tt is not None else TranspositionTable(), control,
+                            orderer if orderer is not None else MoveOrderer(), tablebase=tablebase,
+                            quiescence=quiescence, null_move=null_move, lmr=lmr, futility=futility, pvs=pvs,
+                            aspiration=aspiration, mirror=mirror, stats=stats)
+    context.new_search()
+    context.start_stats()
+    evaluation, move = _minimax(pos, depth, alpha, beta, maximizing_player, 0, context)
+    context.finish_stats(depth)
+    return _search_result(evaluation, move)
+
+
+def _minimax(pos, depth, alpha, beta, maximizing_player, ply, context, allow_null=True):
+    control = context.control
+    control.nodes += 1
+    if control.nodes >= control.next_check:
+        control.check()
+
+    pv_table = context.pv_table
+    pv_table[ply] = []
+    # Only nodes searched with an open window can be on the principal
+    # variation; everything else is a null-window probe.
+    pv_node = beta - alpha > 1
+
+    player = context.player
+    opponent = context.opponent
     current_player = player if maximizing_player else opponent
 
-    if depth == 0 or is_checkmate(board, opponent) or is_checkmate(board, player) or is_stalemate(board, player):
-        return evaluate_func(board, player), None
+    statuses = context.node_statuses(pos, player)
+    player_status, opponent_status = statuses
+    if opponent_status == CHECKMATE or player_status == CHECKMATE or player_status == STALEMATE:
+        return context.evaluate(pos, player, statuses), None
+    if depth == 0:
+        if context.quiescence:
+            return _quiescence(pos, alpha, beta, maximizing_player, ply, context, statuses), None
+        return context.evaluate(pos, player, statuses), None
+
+    if ply > 0 and pos.occupied.bit_count() <= context.tablebase_pieces:
+        # Small endings are scored exactly; tablebase values are measured
+        # for the side to move.
+        value = context.tablebase.probe(pos, current_player)
+        if value is not None:
+            score = distance_score(value)
+            return (score if maximizing_player else -score), None
+
+    tt = context.tt
+    if context.mirror:
+        key, mirrored = pos.canonical_key(current_player)
+    else:
+        key, mirrored = pos.search_key(current_player), False
+    original_alpha, original_beta = alpha, beta
+    hash_move = None
+    entry = tt.probe(key)
+    if entry is not None:
+        _, entry_depth, entry_score, bound, hash_move, _ = entry
+        if mirrored and hash_move is not None:
+            hash_move ^= MIRROR_FILES
+        if entry_depth >= depth and not pv_node:
+            if bound == EXACT:
+                return entry_score, hash_move
+            if bound == LOWER_BOUND:
+                alpha = max(alpha, entry_score)
+            else:
+                beta = min(beta, entry_score)
+            if beta <= alpha:
+                return entry_score, hash_move
+
+    color = color_index(current_player)
+    in_check = statuses[0 if maximizing_player else 1] == CHECK
+    if context.null_move and allow_null and not pv_node and ply > 0 and depth >= NULL_MOVE_MIN_DEPTH and not in_check and \
+            pos.occupancy[color] & ~(pos.bitboards[color * 6 + PAWN] | pos.bitboards[color * 6 + KING]):
+        # Let the opponent move twice: if that still fails to bring the score
+        # back inside the window, some real move will do at least as well.
+        # Not tried with only pawns left, where having to move can be what
+        # loses (zugzwang).
+        reduced_depth = max(depth - 1 - NULL_MOVE_REDUCTION, 0)
+        if maximizing_player and beta != float('inf'):
+            score, _ = _minimax(pos, reduced_depth, beta - 1, beta, False, ply + 1, context, False)
+            if score >= beta:
+                return beta, None
+        elif not maximizing_player and alpha != float('-inf'):
+            score, _ = _minimax(pos, reduced_depth, alpha, alpha + 1, True, ply + 1, context, False)
+            if score <= alpha:
+                return alpha, None
+
+    # At frontier nodes, quiet moves that cannot lift the static evaluation
+    # past the bound by FUTILITY_MARGIN are skipped unless they give check.
+    futile = False
+    if context.futility and depth == 1 and not in_check:
+        static_eval = context.evaluate(pos, player, statuses)
+        if maximizing_player:
+            futile = static_eval + FUTILITY_MARGIN <= alpha
+        else:
+            futile = static_eval - FUTILITY_MARGIN >= beta
+    reduce_late = context.lmr and depth >= LMR_MIN_DEPTH and not in_check
+    pvs = context.pvs
+    next_player = opponent if maximizing_player else player
 
-    valid_moves = generate_moves(board, current_player)
+    valid_moves = context.generate_moves(pos, current_player)
 
-    if use_symmetry:
-        valid_moves = reduce_symmetry(valid_moves)
+    if context.use_symmetry:
+        valid_moves = reduce_encoded_symmetry(valid_moves, pos)
 
     if not valid_moves:
-        return evaluate_func(board, player), None
+        return context.evaluate(pos, player, statuses), None
+
+    orderer = context.orderer
+    orderer.order_moves(pos, valid_moves, ply, color, hash_move)
+    orderer.record_node()
+    squares = pos.squares
 
     best_move = None
 
     if maximizing_player:
-        max_eval = float('-inf')
-        for move in valid_moves:
-            new_board = make_move(board, move)
-            evaluation, _ = minimax(new_board, depth - 1, alpha, beta, False, player, evaluate_func, use_symmetry)
-
-            if evaluation > max_eval:
-                max_eval = evaluation
+        best_eval = float('-inf')
+        for index, move in enumerate(valid_moves):
+            quiet = is_quiet(squares, move)
+            pos.make_move(move)
+            if futile and quiet and index > 0 and not context.is_in_check(pos, next_player):
+                pos.unmake_move()
+                continue
+            reduction = 1 if reduce_late and quiet and index >= LMR_FULL_MOVES else 0
+            if index == 0 or not (pvs or reduction):
+                evaluation, _ = _minimax(pos, depth - 1, alpha, beta, False, ply + 1, context)
+            else:
+                # Later moves only have to be shown no better than alpha, which
+                # a null window does cheaply (late quiet moves one ply
+                # shallower first). A move that beats alpha is searched again
+                # at full depth and, inside the window, with the full window.
+                evaluation, _ = _minimax(pos, depth - 1 - reduction, alpha, alpha + 1, False, ply + 1, context)
+                if reduction and evaluation > alpha:
+                    evaluation, _ = _minimax(pos, depth - 1, alpha, alpha + 1 if pvs else beta, False, ply + 1,
+                                             context)
+                if pvs and alpha < evaluation < beta:
+                    evaluation, _ = _minimax(pos, depth - 1, alpha, beta, False, ply + 1, context)
+            pos.unmake_move()
+
+            if evaluation > best_eval:
+                best_eval = evaluation
                 best_move = move
+                if pv_node:
+                    pv_table[ply] = [move] + pv_table[ply + 1]
 
             alpha = max(alpha, evaluation)
             if beta <= alpha:
+                orderer.record_cutoff(move, index, ply, depth, color, quiet)
                 break
-        return max_eval, best_move
     else:
-        min_eval = float('inf')
-        for move in valid_moves:
-            new_board = make_move(board, move)
-            evaluation, _ = minimax(new_board, depth - 1, alpha, beta, True, player, evaluate_func, use_symmetry)
-
-            if evaluation < min_eval:
-                min_eval = evaluation
+        best_eval = float('inf')
+        for index, move in enumerate(valid_moves):
+            quiet = is_quiet(squares, move)
+            pos.make_move(move)
+            if futile and quiet and index > 0 and not context.is_in_check(pos, next_player):
+                pos.unmake_move()
+                continue
+            reduction = 1 if reduce_late and quiet and index >= LMR_FULL_MOVES else 0
+            if index == 0 or not (pvs or reduction):
+                evaluation, _ = _minimax(pos, depth - 1, alpha, beta, True, ply + 1, context)
+            else:
+                evaluation, _ = _minimax(pos, depth - 1 - reduction, beta - 1, beta, True, ply + 1, context)
+                if reduction and evaluation < beta:
+                    evaluation, _ = _minimax(pos, depth - 1, beta - 1 if pvs else alpha, beta, True, ply + 1,
+                                             context)
+                if pvs and alpha < evaluation < beta:
+                    evaluation, _ = _minimax(pos, depth - 1, alpha, beta, True, ply + 1, context)
+            pos.unmake_move()
+
+            if evaluation < best_eval:
+                best_eval = evaluation
                 best_move = move
+                if pv_node:
+                    pv_table[ply] = [move] + pv_table[ply + 1]
 
             beta = min(beta, evaluation)
             if beta <= alpha:
+                orderer.record_cutoff(move, index, ply, depth, color, quiet)
                 break
-        return min_eval, best_move
 
-def minimax_no_ab(board, depth, maximizing_player, player, evaluate_func, use_symmetry=False):
-    opponent = 'w' if player == 'b' else 'b'
+    if best_eval <= original_alpha:
+        bound = UPPER_BOUND
+    elif best_eval >= original_beta:
+        bound = LOWER_BOUND
+    else:
+        bound = EXACT
+    if mirrored and best_move is not None:
+        tt.store(key, depth, best_eval, bound, best_move ^ MIRROR_FILES)
+    else:
+        tt.store(key, depth, best_eval, bound, best_move)
+    return best_eval, best_move
+
+def _quiescence(pos, alpha, beta, maximizing_player, ply, context, statuses=None):
+    # Plays out captures and promotions past the nominal depth so that leaves
+    # are scored in quiet positions. The side to move may stand pat on the
+    # static evaluation unless it is in check, where every evasion is tried.
+    player = context.player
+    if statuses is None:
+        control = context.control
+        control.nodes += 1
+        if control.nodes >= control.next_check:
+            control.check()
+        statuses = context.node_statuses(pos, player)
+        player_status, opponent_status = statuses
+        if opponent_status == CHECKMATE or player_status == CHECKMATE or player_status == STALEMATE:
+            return context.evaluate(pos, player, statuses)
+
+    current_player = player if maximizing_player else context.opponent
+    in_check = statuses[0 if maximizing_player else 1] == CHECK
+    stand_pat = context.evaluate(pos, player, statuses)
+    if in_check:
+        moves = context.generate_moves(pos, current_player)
+        best_eval = float('-inf') if maximizing_player else float('inf')
+    else:
+        if maximizing_player:
+            if stand_pat >= beta:
+                return stand_pat
+            alpha = max(alpha, stand_pat)
+        else:
+            if stand_pat <= alpha:
+                return stand_pat
+            beta = min(beta, stand_pat)
+        moves = context.generate_captures(pos, current_player)
+        best_eval = stand_pat
+    if not moves:
+        return stand_pat
+
+    color = color_index(current_player)
+    enemy = 1 - color
+    context.orderer.order_moves(pos, moves, ply, color)
+    squares = pos.squares
+    for move in moves:
+        if not in_check:
+            victim = squares[move & 63]
+            gain = CAPTURE_GAINS[victim] + (PROMOTION_GAIN if is_promotion(squares, move) else 0)
+            if maximizing_player:
+                if stand_pat + gain + DELTA_MARGIN <= alpha:
+                    continue
+            elif stand_pat - gain - DELTA_MARGIN >= beta:
+                continue
+            to_sq = move & 63
+            if CAPTURE_GAINS[squares[move >> 6]] > gain and \
+                    bitboard.attacks_square(pos.bitboards, pos.occupied, to_sq, enemy):
+                # Taking a defended piece with a more valuable one loses
+                # material on the recapture.
+                continue
+        pos.make_move(move)
+        evaluation = _quiescence(pos, alpha, beta, not maximizing_player, ply + 1, context)
+        pos.unmake_move()
+
+        if maximizing_player:
+            if evaluation > best_eval:
+                best_eval = evaluation
+            alpha = max(alpha, evaluation)
+        else:
+            if evaluation < best_eval:
+                best_eval = evaluation
+            beta = min(beta, evaluation)
+        if beta <= alpha:
+            break
+    return best_eval
+
+
+def minimax_no_ab(board, depth, maximizing_player, player, evaluate_func, use_symmetry=False, control=None, stats=None):
+    pos = from_board(board)
+    context = SearchContext(player, evaluate_func, use_symmetry, control=control, quiescence=False, stats=stats)
+    context.start_stats()
+    evaluation, move = _minimax_no_ab(pos, depth, maximizing_player, context)
+    context.finish_stats(depth)
+    return _search_result(evaluation, move)
+
+
+def _minimax_no_ab(pos, depth, maximizing_player, context):
+    control = context.control
+    control.nodes += 1
+    if control.nodes >= control.next_check:
+        control.check()
+
+    player = context.player
+    opponent = context.opponent
     current_player = player if maximizing_player else opponent
 
-    if depth == 0 or is_checkmate(board, opponent) or is_checkmate(board, player) or is_stalemate(board, player):
-        return evaluate_func(board, player), None
+    statuses = context.node_statuses(pos, player)
+    player_status, opponent_status = statuses
+    if depth == 0 or opponent_status == CHECKMATE or player_status == CHECKMATE or player_status == STALEMATE:
+        return context.evaluate(pos, player, statuses), None
 
-    valid_moves = generate_moves(board, current_player)
+    valid_moves = context.generate_moves(pos, current_player)
 
-    if use_symmetry:
-        valid_moves = reduce_symmetry(valid_moves)
+    if context.use_symmetry:
+        valid_moves = reduce_encoded_symmetry(valid_moves, pos)
 
     if not valid_moves:
-        return evaluate_func(board, player), None
+        return context.evaluate(pos, player, statuses), None
 
     best_move = None
 
     if maximizing_player:
         max_eval = float('-inf')
         for move in valid_moves:
-            new_board = make_move(board, move)
-            evaluation, _ = minimax_no_ab(new_board, depth - 1, False, player, evaluate_func, use_symmetry)
+            pos.make_move(move)
+            evaluation, _ = _minimax_no_ab(pos, depth - 1, False, context)
+            pos.unmake_move()
 
             if evaluation > max_eval:
                 max_eval = evaluation
@@ -223,8 +674,9 @@ def minimax_no_ab(board, depth, maximizing_player, player, evaluate_func, use_sy
     else:
         min_eval = float('inf')
         for move in valid_moves:
-            new_board = make_move(board, move)
-            evaluation, _ = minimax_no_ab(new_board, depth - 1, True, player, evaluate_func, use_symmetry)
+            pos.make_move(move)
+            evaluation, _ = _minimax_no_ab(pos, depth - 1, True, context)
+            pos.unmake_move()
 
             if evaluation < min_eval:
                 min_eval = evaluation
@@ -232,21 +684,99 @@ def minimax_no_ab(board, depth, maximizing_player, player, evaluate_func, use_sy
         return min_eval, best_move
 
 
+def _aspiration_search(pos, depth, guess, context):
+    # Searches a window around the previous iteration's score, widening the
+    # side that failed until the score lands inside it.
+    delta = ASPIRATION_WINDOW
+    alpha, beta = guess - delta, guess + delta
+    while True:
+        evaluation, move = _minimax(pos, depth, alpha, beta, True, 0, context)
+        delta *= ASPIRATION_GROWTH
+        if evaluation <= alpha:
+            alpha = evaluation - delta if delta <= ASPIRATION_LIMIT else float('-inf')
+        elif evaluation >= beta:
+            beta = evaluation + delta if delta <= ASPIRATION_LIMIT else float('inf')
+        else:
+            return evaluation, move
+
+
+def iterative_deepening(board, player, evaluate_func, use_symmetry=False, time_limit=None, max_nodes=None,
+                        max_depth=MAX_SEARCH_DEPTH, alpha_beta=True, tt=None, control=None, orderer=None,
+                        on_iteration=None, *, tablebase=None, quiescence=True, null_move=True, lmr=True,
+                        futility=True, pvs=True, aspiration=True, mirror=True, stats=None):
+    pos = from_board(board)
+    if control is None:
+        control = SearchControl(time_limit, max_nodes)
+    if alpha_beta:
+        context = SearchContext(player, evaluate_func, use_symmetry,
+                                tt if tt is not None else TranspositionTable(), control,
+                                orderer if orderer is not None else MoveOrderer(), tablebase=tablebase,
+                                quiescence=quiescence, null_move=null_move, lmr=lmr, futility=futility, pvs=pvs,
+                                aspiration=aspiration, mirror=mirror, stats=stats)
+    else:
+        context = SearchContext(player, evaluate_func, use_symmetry, control=control, quiescence=False, stats=stats)
+
+    context.start_stats()
+    best_eval, best_move, depth_reached = None, None, 0
+    for depth in range(1, max_depth + 1):
+        if depth > 1 and not control.can_start_iteration():
+            break
+        try:
+            if alpha_beta:
+                context.new_search()
+                if context.aspiration and depth >= ASPIRATION_MIN_DEPTH and best_eval is not None:
+                    evaluation, move = _aspiration_search(pos, depth, best_eval, context)
+                else:
+                    evaluation, move = _minimax(pos, depth, float('-inf'), float('inf'), True, 0, context)
+            else:
+                evaluation, move = _minimax_no_ab(pos, depth, True, context)
+        except SearchAborted:
+            while pos.history:
+                pos.unmake_move()
+            break
+
+        best_eval, best_move, depth_reached = evaluation, move, depth
+        control.depth = depth
+        pv = context.pv_table.get(0) if alpha_beta else None
+        control.pv = [decode_move(m) for m in pv] if pv else [decode_move(move)] if move is not None else []
+        if on_iteration is not None:
+            on_iteration(depth, evaluation, decode_move(move) if move is not None else None, control)
+        if move is None:
+            break
+
+    if best_move is None and depth_reached == 0:
+        # Not even one ply fit in the budget; fall back to the first legal move.
+        valid_moves = bitboard.generate_moves(pos, player)
+        if use_symmetry:
+            valid_moves = reduce_encoded_symmetry(valid_moves, pos)
+        if valid_moves:
+            best_move = valid_moves[0]
+
+    context.finish_stats(depth_reached)
+    evaluation, move = _search_result(best_eval, best_move)
+    return evaluation, move, depth_reached
+
+
 def simple_heuristic_ai(board, player, evaluate_func, use_symmetry=False):
-    valid_moves = generate_moves(board, player)
+    pos = from_board(board)
+    valid_moves = bitboard.generate_moves(pos, player)
     if not valid_moves:
         return None
 
     if use_symmetry:
-        valid_moves = reduce_symmetry(valid_moves)
+        valid_moves = reduce_encoded_symmetry(valid_moves, pos)
+
+    evaluate = position_evaluator(evaluate_func)
+    evaluations = []
+    for move in valid_moves:
+        pos.make_move(move)
+        evaluations.append(evaluate(pos, player))
+        pos.unmake_move()
 
     best_move = None
     best_eval = float('-inf')
 
-    for move in valid_moves:
-        new_board = make_move(board, move)
-        evaluation = evaluate_func(new_board, player)
-
+    for move, evaluation in zip(valid_moves, evaluations):
         if evaluation > best_eval:
             best_eval = evaluation
             best_move = move
@@ -254,7 +784,7 @@ def simple_heuristic_ai(board, player, evaluate_func, use_symmetry=False):
             if random.random() < 0.5:
                 best_move = move
 
-    return best_move
+    return decode_move(best_move)
 
 def pure_symmetry_reduction_ai(board, player, evaluate_func=None, use_symmetry=True):
 
@@ -263,7 +793,7 @@ def pure_symmetry_reduction_ai(board, player, evaluate_func=None, use_symmetry=T
         return None
 
     if use_symmetry:
-        reduced_moves = reduce_symmetry(valid_moves)
+        reduced_moves = reduce_symmetry(valid_moves, board)
         if reduced_moves:
             return reduced_moves[0]
         else:
@@ -0,0 +1,95 @@
+from .bitboard import CODE_TYPE, CODE_COLOR, EMPTY, PAWN, PROMOTION_ROW
+
+MAX_PLY = 64
+
+HASH_MOVE_SCORE = 1 << 30
+CAPTURE_SCORE = 1 << 24
+PROMOTION_SCORE = CAPTURE_SCORE - 1
+FIRST_KILLER_SCORE = 1 << 22
+SECOND_KILLER_SCORE = FIRST_KILLER_SCORE - 1
+HISTORY_LIMIT = SECOND_KILLER_SCORE - 1
+
+ORDERING_VALUES = [10, 30, 30, 50, 90, 1000]
+VICTIM_SCORES = [ORDERING_VALUES[CODE_TYPE[code]] * 100 if code != EMPTY else 0 for code in range(13)]
+ATTACKER_SCORES = [ORDERING_VALUES[CODE_TYPE[code]] if code != EMPTY else 0 for code in range(13)]
+
+
+def is_promotion(squares, move):
+    piece = squares[move >> 6]
+    return CODE_TYPE[piece] == PAWN and (move & 63) >> 3 == PROMOTION_ROW[CODE_COLOR[piece]]
+
+
+def is_quiet(squares, move):
+    return squares[move & 63] == EMPTY and not is_promotion(squares, move)
+
+
+class MoveOrderer:
+    def __init__(self):
+        self.killers = [[None, None] for _ in range(MAX_PLY)]
+        self.history = [0] * 8192
+        self.cutoff_counts = []
+        self.nodes_searched = 0
+
+    def new_search(self):
+        self.killers = [[None, None] for _ in range(MAX_PLY)]
+        self.history = [value >> 1 for value in self.history]
+
+    def reset_stats(self):
+        self.cutoff_counts = []
+        self.nodes_searched = 0
+
+    def order_moves(self, pos, moves, ply, color, hash_move=None):
+        squares = pos.squares
+        history = self.history
+        base = color << 12
+        first_killer, second_killer = self.killers[ply] if ply < MAX_PLY else (None, None)
+
+        def score(move):
+            if move == hash_move:
+                return HASH_MOVE_SCORE
+            victim = squares[move & 63]
+            if victim != EMPTY:
+                return CAPTURE_SCORE + VICTIM_SCORES[victim] - ATTACKER_SCORES[squares[move >> 6]]
+            if is_promotion(squares, move):
+                return PROMOTION_SCORE
+            if move == first_killer:
+                return FIRST_KILLER_SCORE
+            if move == second_killer:
+                return SECOND_KILLER_SCORE
+            return history[base | move]
+
+        moves.sort(key=score, reverse=True)
+        return moves
+
+    def record_node(self):
+        self.nodes_searched += 1
+
+    def record_cutoff(self, move, index, ply, depth, color, quiet):
+        counts = self.cutoff_counts
+        while len(counts) <= index:
+            counts.append(0)
+        counts[index] += 1
+
+        if not quiet:
+            return
+        if ply < MAX_PLY:
+            killers = self.killers[ply]
+            if killers[0] != move:
+                killers[1] = killers[0]
+                killers[0] = move
+        slot = color << 12 | move
+        self.history[slot] = min(self.history[slot] + depth * depth, HISTORY_LIMIT)
+
+    def stats(self):
+        cutoffs = sum(self.cutoff_counts)
+        first_move_cutoffs = self.cutoff_counts[0] if self.cutoff_counts else 0
+        weighted = sum(index * count for index, count in enumerate(self.cutoff_counts))
+        return {
+            "nodes": self.nodes_searched,
+            "cutoffs": cutoffs,
+            "cutoff_rate": cutoffs / self.nodes_searched if self.nodes_searched else 0.0,
+            "first_move_cutoffs": first_move_cutoffs,
+            "first_move_cutoff_rate": first_move_cutoffs / cutoffs if cutoffs else 0.0,
+            "average_cutoff_index": weighted / cutoffs if cutoffs else 0.0,
+            "cutoffs_by_index": list(self.cutoff_counts),
+        }
@@ -0,0 +1,186 @@
+import argparse
+import mmap
+import os
+import random
+import re
+import struct
+import sys
+from collections import Counter
+from . import bitboard
+from .bitboard import from_board, encode_move, decode_move
+from .board import board_state, board_from_fen, make_move, move_from_san, move_to_san
+
+# File layout: an 8-byte magic followed by fixed-size (key, move, weight)
+# records sorted by key, so a lookup is a binary search over the mapped file.
+BOOK_MAGIC = b"CHSBOOK1"
+RECORD = struct.Struct(">QHH")
+HEADER_SIZE = len(BOOK_MAGIC)
+MAX_WEIGHT = 0xFFFF
+DEFAULT_BOOK_PLIES = 16
+
+PGN_NOISE = re.compile(r"\{[^}]*\}|;[^\n]*|\$\d+")
+PGN_VARIATION = re.compile(r"\([^()]*\)")
+PGN_MOVE_NUMBER = re.compile(r"^\d+\.+")
+GAME_RESULTS = {"1-0", "0-1", "1/2-1/2", "*"}
+
+
+class OpeningBook:
+    def __init__(self, path):
+        self.file = open(path, "rb")
+        size = os.fstat(self.file.fileno()).st_size
+        if size < HEADER_SIZE:
+            self.file.close()
+            raise ValueError(f"Not an opening book: {path}")
+        self.data = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        if self.data[:HEADER_SIZE] != BOOK_MAGIC:
+            self.close()
+            raise ValueError(f"Not an opening book: {path}")
+        self.count = (size - HEADER_SIZE) // RECORD.size
+
+    def _record(self, index):
+        return RECORD.unpack_from(self.data, HEADER_SIZE + index * RECORD.size)
+
+    def probe(self, key):
+        low, high = 0, self.count
+        while low < high:
+            middle = (low + high) // 2
+            if self._record(middle)[0] < key:
+                low = middle + 1
+            else:
+                high = middle
+        entries = []
+        while low < self.count:
+            record_key, move, weight = self._record(low)
+            if record_key != key:
+                break
+            entries.append((move, weight))
+            low += 1
+        return entries
+
+    def choose_move(self, board, player, rng=random):
+        pos = from_board(board)
+        legal_moves = bitboard.generate_moves(pos, player)
+        entries = [(move, weight) for move, weight in self.probe(pos.search_key(player)) if move in legal_moves]
+        if not entries:
+            return None
+        moves, weights = zip(*entries)
+        return decode_move(rng.choices(moves, weights)[0])
+
+    def close(self):
+        self.data.close()
+        self.file.close()
+
+
+def load_opening_book(path):
+    if not os.path.exists(path):
+        return None
+    try:
+        return OpeningBook(path)
+    except (OSError, ValueError):
+        return None
+
+
+def read_move_lists(path):
+    # One game per line, moves in SAN or coordinate notation.
+    with open(path) as f:
+        for line in f:
+            line = line.split("#", 1)[0].strip()
+            if line:
+                yield line.split()
+
+
+def read_pgn(path):
+    with open(path) as f:
+        lines = []
+        for line in f:
+            line = line.strip()
+            if line.startswith("["):
+                if lines:
+                    yield _pgn_moves(" ".join(lines))
+                    lines = []
+                continue
+            if line:
+                lines.append(line)
+        if lines:
+            yield _pgn_moves(" ".join(lines))
+
+
+def _pgn_moves(text):
+    text = PGN_NOISE.sub(" ", text)
+    while PGN_VARIATION.search(text):
+        text = PGN_VARIATION.sub(" ", text)
+    moves = []
+    for token in text.split():
+        token = PGN_MOVE_NUMBER.sub("", token)
+        if token and token not in GAME_RESULTS:
+            moves.append(token)
+    return moves
+
+
+def read_games(path):
+    if path.lower().endswith(".pgn"):
+        return read_pgn(path)
+    return read_move_lists(path)
+
+
+def count_book_moves(games, max_plies=DEFAULT_BOOK_PLIES):
+    counts = Counter()
+    for game in games:
+        board, player = [row[:] for row in board_state], 'w'
+        for text in game[:max_plies]:
+            try:
+                move = move_from_san(board, player, text)
+            except ValueError:
+                # Castling, en passant and under-promotion do not exist here,
+                # so the rest of such a game cannot be replayed.
+                break
+            key = from_board(board).search_key(player)
+            counts[key, encode_move(move)] += 1
+            board = make_move(board, move)
+            player = 'b' if player == 'w' else 'w'
+    return counts
+
+
+def write_book(counts, path, min_count=1):
+    records = sorted((key, move, min(count, MAX_WEIGHT)) for (key, move), count in counts.items() if count >= min_count)
+    with open(path, "wb") as f:
+        f.write(BOOK_MAGIC)
+        for record in records:
+            f.write(RECORD.pack(*record))
+    return len(records)
+
+
+def build_book(source, path, max_plies=DEFAULT_BOOK_PLIES, min_count=1):
+    return write_book(count_book_moves(read_games(source), max_plies), path, min_count)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build or query the opening book.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    build = subparsers.add_parser("build", help="build a book from a PGN file or a file of move lists")
+    build.add_argument("source")
+    build.add_argument("book")
+    build.add_argument("--plies", type=int, default=DEFAULT_BOOK_PLIES, help="book moves taken from each game")
+    build.add_argument("--min-count", type=int, default=1, help="drop moves played fewer times than this")
+    probe = subparsers.add_parser("probe", help="list the book moves for a position")
+    probe.add_argument("book")
+    probe.add_argument("--fen", default="rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w")
+    args = parser.parse_args(argv)
+
+    if args.command == "build":
+        records = build_book(args.source, args.book, args.plies, args.min_count)
+        print(f"wrote {records} records to {args.book}")
+        return 0
+
+    book = OpeningBook(args.book)
+    board, player = board_from_fen(args.fen)
+    entries = book.probe(from_board(board).search_key(player))
+    total = sum(weight for _, weight in entries)
+    for move, weight in sorted(entries, key=lambda entry: -entry[1]):
+        print(f"{move_to_san(board, player, decode_move(move)):8s} {weight:6d} {weight / total:6.1%}")
+    book.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,198 @@
+import argparse
+import os
+import time
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from . import bitboard
+from .bitboard import from_board, decode_move, color_index
+from .board import board_state, make_move
+from .minimax import (minimax, _minimax, node_statuses, SearchContext, SearchControl, evaluate_board_material,
+                     evaluate_board_pst, evaluate_board_combined, CHECK, CHECKMATE, STALEMATE, LMR_FULL_MOVES,
+                     LMR_MIN_DEPTH)
+from .move_ordering import MoveOrderer, is_quiet
+from .symmetry_reducer import reduce_encoded_symmetry
+from .transposition import SharedTranspositionTable, DEFAULT_MEGABYTES
+
+_shared_alpha = None
+_shared_tt = None
+
+
+def _init_worker(shared_alpha, shared_tt):
+    global _shared_alpha, _shared_tt
+    _shared_alpha = shared_alpha
+    _shared_tt = shared_tt
+
+
+def _raise_shared_alpha(shared_alpha, score):
+    with shared_alpha.get_lock():
+        if score > shared_alpha.value:
+            shared_alpha.value = score
+
+
+def _read_shared_alpha():
+    with _shared_alpha.get_lock():
+        return _shared_alpha.value
+
+
+def _search_root_move(board, move, depth, player, evaluate_func, use_symmetry):
+    pos = from_board(board)
+    pos.make_move(move)
+    context = SearchContext(player, evaluate_func, use_symmetry, _shared_tt, SearchControl(), MoveOrderer())
+    context.new_search()
+    opponent = context.opponent
+    player_status, opponent_status = node_statuses(pos, player)
+    replies = bitboard.generate_moves(pos, opponent)
+    if use_symmetry:
+        replies = reduce_encoded_symmetry(replies, pos)
+    if opponent_status == CHECKMATE or player_status in (CHECKMATE, STALEMATE) or not replies:
+        score, _ = _minimax(pos, depth - 1, _read_shared_alpha(), float('inf'), False, 1, context)
+        _raise_shared_alpha(_shared_alpha, score)
+        return score, context.control.nodes
+
+    # The opponent's replies are searched here rather than in one _minimax
+    # call so that the bound is re-read before each of them: once another
+    # worker has raised alpha past this move's best reply so far, the move
+    # is refuted and the rest of its replies are skipped.
+    context.control.nodes += 1
+    context.orderer.order_moves(pos, replies, 1, color_index(opponent))
+    reduce_late = depth - 1 >= LMR_MIN_DEPTH and opponent_status != CHECK
+    best_score = float('inf')
+    for index, reply in enumerate(replies):
+        alpha = _read_shared_alpha()
+        if best_score <= alpha:
+            break
+        quiet = is_quiet(pos.squares, reply)
+        pos.make_move(reply)
+        if index == 0:
+            score, _ = _minimax(pos, depth - 2, alpha, best_score, True, 2, context)
+        else:
+            # As in _minimax: a null window first, late quiet replies one ply
+            # shallower, and a full re-search for a reply inside the window.
+            reduction = 1 if reduce_late and quiet and index >= LMR_FULL_MOVES else 0
+            score, _ = _minimax(pos, depth - 2 - reduction, best_score - 1, best_score, True, 2, context)
+            if reduction and score < best_score:
+                score, _ = _minimax(pos, depth - 2, best_score - 1, best_score, True, 2, context)
+            if alpha < score < best_score:
+                score, _ = _minimax(pos, depth - 2, alpha, best_score, True, 2, context)
+        pos.unmake_move()
+        best_score = min(best_score, score)
+    _raise_shared_alpha(_shared_alpha, best_score)
+    return best_score, context.control.nodes
+
+
+class ParallelSearcher:
+    def __init__(self, workers=None, tt_megabytes=DEFAULT_MEGABYTES):
+        self.workers = workers or os.cpu_count() or 1
+        self.shared_alpha = multiprocessing.Value('d', float('-inf'))
+        # One table for this process and every worker, so positions reached
+        # under different root moves are only searched once.
+        self.tt = SharedTranspositionTable(tt_megabytes)
+        self.executor = ProcessPoolExecutor(max_workers=self.workers, initializer=_init_worker,
+                                            initargs=(self.shared_alpha, self.tt))
+        self.tt_owner = None
+        self.nodes = 0
+
+    def search(self, board, depth, player, evaluate_func, use_symmetry=False):
+        # Root split: the first (best-ordered) move is searched here to get an
+        # alpha bound, then the remaining root moves are farmed out to the
+        # pool, each starting from the best bound found so far.
+        pos = from_board(board)
+        player_status, opponent_status = node_statuses(pos, player)
+        if depth <= 1 or opponent_status == CHECKMATE or player_status in (CHECKMATE, STALEMATE):
+            return minimax(board, depth, float('-inf'), float('inf'), True, player, evaluate_func, use_symmetry)
+
+        valid_moves = bitboard.generate_moves(pos, player)
+        if use_symmetry:
+            valid_moves = reduce_encoded_symmetry(valid_moves, pos)
+        if not valid_moves:
+            return minimax(board, depth, float('-inf'), float('inf'), True, player, evaluate_func, use_symmetry)
+        MoveOrderer().order_moves(pos, valid_moves, 0, color_index(player))
+
+        # Stored scores depend on the evaluator and on whose side they are
+        # measured from, so the table is only kept for the same pair.
+        if self.tt_owner != (player, evaluate_func):
+            self.tt.clear()
+            self.tt_owner = (player, evaluate_func)
+        self.tt.next_generation()
+        context = SearchContext(player, evaluate_func, use_symmetry, self.tt, SearchControl(), MoveOrderer())
+        context.new_search()
+        first_move = valid_moves[0]
+        pos.make_move(first_move)
+        first_score, _ = _minimax(pos, depth - 1, float('-inf'), float('inf'), False, 1, context)
+        pos.unmake_move()
+        self.nodes = context.control.nodes
+
+        with self.shared_alpha.get_lock():
+            self.shared_alpha.value = first_score
+        futures = [self.executor.submit(_search_root_move, board, move, depth, player, evaluate_func, use_symmetry)
+                   for move in valid_moves[1:]]
+
+        best_score, best_move = first_score, first_move
+        for move, future in zip(valid_moves[1:], futures):
+            score, nodes = future.result()
+            self.nodes += nodes
+            if score > best_score:
+                best_score, best_move = score, move
+        return best_score, decode_move(best_move)
+
+    def close(self):
+        self.executor.shutdown(cancel_futures=True)
+        self.tt.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def parallel_minimax(board, depth, player, evaluate_func, use_symmetry=False, workers=None, tt_megabytes=DEFAULT_MEGABYTES):
+    with ParallelSearcher(workers, tt_megabytes) as searcher:
+        return searcher.search(board, depth, player, evaluate_func, use_symmetry)
+
+
+BENCHMARK_OPENINGS = [
+    [],
+    [((6, 4), (4, 4)), ((1, 4), (3, 4)), ((7, 6), (5, 5)), ((0, 1), (2, 2))],
+    [((6, 3), (4, 3)), ((1, 3), (3, 3)), ((6, 2), (4, 2)), ((1, 4), (2, 4)), ((7, 1), (5, 2))],
+]
+
+EVALUATORS = {
+    "material": evaluate_board_material,
+    "pst": evaluate_board_pst,
+    "combined": evaluate_board_combined,
+}
+
+
+def benchmark(depth, worker_counts, heuristic):
+    evaluate_func = EVALUATORS[heuristic]
+    boards = []
+    for moves in BENCHMARK_OPENINGS:
+        board = [row[:] for row in board_state]
+        for move in moves:
+            board = make_move(board, move)
+        boards.append((board, 'w' if len(moves) % 2 == 0 else 'b'))
+
+    start_time = time.perf_counter()
+    for board, player in boards:
+        minimax(board, depth, float('-inf'), float('inf'), True, player, evaluate_func)
+    serial_time = time.perf_counter() - start_time
+    print(f"serial          {serial_time:8.2f}s")
+
+    for workers in worker_counts:
+        with ParallelSearcher(workers) as searcher:
+            searcher.search(boards[0][0], 1, boards[0][1], evaluate_func)
+            start_time = time.perf_counter()
+            for board, player in boards:
+                searcher.search(board, depth, player, evaluate_func)
+            elapsed = time.perf_counter() - start_time
+        print(f"{workers:2d} workers      {elapsed:8.2f}s  speedup {serial_time / elapsed:5.2f}x")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark root-split parallel minimax against the serial search.")
+    parser.add_argument("--depth", type=int, default=4)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, os.cpu_count() or 1])
+    parser.add_argument("--heuristic", choices=sorted(EVALUATORS), default="combined")
+    args = parser.parse_args()
+    benchmark(args.depth, args.workers, args.heuristic)
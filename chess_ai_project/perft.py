@@ -0,0 +1,126 @@
+import argparse
+import sys
+import time
+from . import bitboard
+from .bitboard import from_board, MOVE_TUPLES
+from .board import board_from_fen, generate_moves, make_move, move_to_uci
+
+START_FEN = "rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w"
+
+# Leaf counts under this engine's rules: pawns promote to queens only, there is
+# no castling or en passant, kings do not give check and may capture the enemy
+# king. They therefore differ from the usual published perft tables.
+REFERENCE_POSITIONS = [
+    ("start", START_FEN, {1: 20, 2: 400, 3: 8902, 4: 197281, 5: 4865351}),
+    ("kiwipete", "r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w", {1: 46, 2: 1865, 3: 86585, 4: 3488552}),
+    ("rook endgame", "8/2p5/3p4/KP5r/1R3p1k/8/4P1P1/8 w", {1: 14, 2: 191, 3: 2810, 4: 43087, 5: 671300}),
+    ("promotions", "n1n5/PPPk4/8/8/8/8/4Kppp/5N1N b", {1: 15, 2: 210, 3: 3253, 4: 47873, 5: 809365}),
+    ("pins and checks", "r3k2r/Pppp1ppp/1b3nbN/nP6/BBP1P3/q4N2/Pp1P2PP/R2Q1RK1 w", {1: 6, 2: 222, 3: 7855, 4: 305965}),
+]
+
+
+def opponent_of(player):
+    return 'b' if player == 'w' else 'w'
+
+
+def perft(pos, player, depth):
+    if depth == 0:
+        return 1
+    moves = bitboard.generate_moves(pos, player)
+    if depth == 1:
+        return len(moves)
+    opponent = opponent_of(player)
+    nodes = 0
+    for move in moves:
+        pos.make_move(move)
+        nodes += perft(pos, opponent, depth - 1)
+        pos.unmake_move()
+    return nodes
+
+
+def perft_board(board, player, depth):
+    if depth == 0:
+        return 1
+    moves = generate_moves(board, player)
+    if depth == 1:
+        return len(moves)
+    opponent = opponent_of(player)
+    return sum(perft_board(make_move(board, move), opponent, depth - 1) for move in moves)
+
+
+def divide(board, player, depth, board_api=False):
+    counts = []
+    if board_api:
+        for move in generate_moves(board, player):
+            counts.append((move, perft_board(make_move(board, move), opponent_of(player), depth - 1)))
+        return counts
+    pos = from_board(board)
+    for move in bitboard.generate_moves(pos, player):
+        pos.make_move(move)
+        counts.append((MOVE_TUPLES[move], perft(pos, opponent_of(player), depth - 1)))
+        pos.unmake_move()
+    return counts
+
+
+def count_nodes(board, player, depth, board_api=False):
+    if board_api:
+        return perft_board(board, player, depth)
+    return perft(from_board(board), player, depth)
+
+
+def report(nodes, elapsed):
+    nps = nodes / elapsed if elapsed > 0 else 0.0
+    return f"{nodes} nodes in {elapsed:.3f}s ({nps:,.0f} nodes/s)"
+
+
+def run_suite(max_depth=None, board_api=False):
+    failures = 0
+    total_nodes = 0
+    start_time = time.perf_counter()
+    for name, fen, expected_counts in REFERENCE_POSITIONS:
+        board, player = board_from_fen(fen)
+        for depth, expected in sorted(expected_counts.items()):
+            if max_depth is not None and depth > max_depth:
+                continue
+            depth_start = time.perf_counter()
+            nodes = count_nodes(board, player, depth, board_api)
+            elapsed = time.perf_counter() - depth_start
+            total_nodes += nodes
+            status = "ok" if nodes == expected else f"FAIL (expected {expected})"
+            if nodes != expected:
+                failures += 1
+            print(f"{name:16s} depth {depth}: {report(nodes, elapsed)} {status}")
+    print(f"total: {report(total_nodes, time.perf_counter() - start_time)}, {failures} failed")
+    return failures
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Count move generation leaf nodes (perft).")
+    parser.add_argument("--fen", default=START_FEN, help="position to search (piece placement and side to move)")
+    parser.add_argument("--depth", type=int, default=4)
+    parser.add_argument("--divide", action="store_true", help="print the leaf count under each root move")
+    parser.add_argument("--board-api", action="store_true",
+                        help="use board.generate_moves/make_move on list boards instead of the bitboard position")
+    parser.add_argument("--suite", action="store_true", help="check the reference positions")
+    parser.add_argument("--max-depth", type=int, default=None, help="deepest reference count checked by --suite")
+    args = parser.parse_args(argv)
+
+    if args.suite:
+        return 1 if run_suite(args.max_depth, args.board_api) else 0
+
+    board, player = board_from_fen(args.fen)
+    start_time = time.perf_counter()
+    if args.divide:
+        counts = divide(board, player, args.depth, args.board_api)
+        for move, nodes in counts:
+            print(f"{move_to_uci(move)}: {nodes}")
+        nodes = sum(nodes for _, nodes in counts)
+        print(f"moves: {len(counts)}")
+    else:
+        nodes = count_nodes(board, player, args.depth, args.board_api)
+    print(report(nodes, time.perf_counter() - start_time))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
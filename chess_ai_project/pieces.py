@@ -2,6 +2,7 @@ import pygame
 import os
 
 PIECE_IMAGES = {}
+ASSETS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "assets")
 
 def load_piece_images(square_size):
     pieces = [
@@ -9,7 +10,7 @@ def load_piece_images(square_size):
         "b_pawn", "b_rook", "b_knight", "b_bishop", "b_queen", "b_king"
     ]
     for piece in pieces:
-        img_path = os.path.join("assets", piece + ".png")
+        img_path = os.path.join(ASSETS_DIR, piece + ".png")
         try:
             image = pygame.image.load(img_path)
             PIECE_IMAGES[piece] = pygame.transform.scale(image, (square_size, square_size))
@@ -1,4 +1,19 @@
-def reduce_symmetry(moves):
+# Mirroring the board left to right maps square sq to sq ^ MIRROR_SQUARE and
+# an encoded move to move ^ MIRROR_FILES. A move and its mirror only lead to
+# equivalent positions when the board is its own mirror image, so the
+# reducers leave the moves of any other position alone.
+MIRROR_SQUARE = 7
+MIRROR_FILES = MIRROR_SQUARE << 6 | MIRROR_SQUARE
+
+
+def is_mirror_symmetric(board):
+    return all(row == row[::-1] for row in board)
+
+
+def reduce_symmetry(moves, board):
+    if not is_mirror_symmetric(board):
+        return moves
+
     unique_moves = []
     seen_moves = set()
 
@@ -15,3 +30,21 @@ def reduce_symmetry(moves):
             seen_moves.add(flipped_move_str)
 
     return unique_moves
+
+
+def reduce_encoded_symmetry(moves, pos):
+    if pos.key != pos.mirror_key:
+        return moves
+
+    unique_moves = []
+    seen_moves = set()
+
+    for move in moves:
+        flipped_move = move ^ MIRROR_FILES
+
+        if move not in seen_moves and flipped_move not in seen_moves:
+            unique_moves.append(move)
+            seen_moves.add(move)
+            seen_moves.add(flipped_move)
+
+    return unique_moves
@@ -0,0 +1,448 @@
+import argparse
+import itertools
+import mmap
+import os
+import sys
+import time
+from array import array
+from . import bitboard
+from .bitboard import (Position, EMPTY, PAWN, KNIGHT, BISHOP, ROOK, QUEEN, KING, CODE_TYPE, CODE_COLOR, PROMOTION_ROW,
+                      decode_move)
+from .board import board_from_fen, move_to_san
+
+# numpy is only needed to generate tables. It is imported on first use so
+# that probing, and importing the engine, do not pay for it.
+np = None
+_numpy_checked = False
+
+
+def numpy_available():
+    global np, _numpy_checked
+    if not _numpy_checked:
+        _numpy_checked = True
+        try:
+            import numpy
+        except ImportError:
+            return False
+        np = numpy
+    return np is not None
+
+# Distance-to-mate tables for small endings under this engine's rules (kings
+# do not give check and may capture each other, promotion is to a queen).
+# A table holds one byte per position: 0 for a draw, otherwise 1 + the number
+# of plies to mate with best play, where an odd count means the side to move
+# delivers mate and an even count means it gets mated.
+TABLE_MAGIC = b"CHSTB001"
+TABLE_SUFFIX = ".tb"
+DEFAULT_DIRECTORY = "tablebases"
+DEFAULT_ENDINGS = ["KQvK", "KRvK", "KBvK", "KNvK", "KPvK"]
+MAX_PIECES = 4
+
+TB_WIN_SCORE = 10000
+MAX_DISTANCE = 254
+
+TYPE_LETTERS = {KING: "K", QUEEN: "Q", ROOK: "R", BISHOP: "B", KNIGHT: "N", PAWN: "P"}
+LETTER_TYPES = {letter: piece_type for piece_type, letter in TYPE_LETTERS.items()}
+SIDE_ORDER = [KING, QUEEN, ROOK, BISHOP, KNIGHT, PAWN]
+
+UNKNOWN = -1
+INVALID = -2
+DRAW = -3
+
+
+def _transform(sq, transform):
+    row, col = divmod(sq, 8)
+    x, y = col, 7 - row
+    if transform & 1:
+        x = 7 - x
+    if transform & 2:
+        y = 7 - y
+    if transform & 4:
+        x, y = y, x
+    return (7 - y) * 8 + x
+
+
+TRANSFORMS = [[_transform(sq, transform) for sq in range(64)] for transform in range(8)]
+FLIP_COLORS = [sq ^ 56 for sq in range(64)]
+
+
+class Layout:
+    # Positions are indexed by the square of the first piece, folded into a
+    # fundamental region of the board's symmetries, then the squares of the
+    # other pieces and the side to move. Pawns rule out all but the file
+    # mirror; otherwise the first piece is kept in the a1-d1-d4 triangle.
+    def __init__(self, has_pawns):
+        if has_pawns:
+            transforms = (0, 1)
+            self.region = [sq for sq in range(64) if sq % 8 <= 3]
+        else:
+            transforms = range(8)
+            self.region = [sq for sq in range(64) if sq % 8 <= 3 and 7 - sq // 8 <= sq % 8]
+        self.region_index = {sq: index for index, sq in enumerate(self.region)}
+        self.anchor_transform = [next(t for t in transforms if TRANSFORMS[t][sq] in self.region_index)
+                                 for sq in range(64)]
+
+    def index(self, squares, side):
+        mapping = TRANSFORMS[self.anchor_transform[squares[0]]]
+        index = self.region_index[mapping[squares[0]]]
+        for sq in squares[1:]:
+            index = index * 64 + mapping[sq]
+        return index * 2 + side
+
+
+LAYOUTS = {True: Layout(True), False: Layout(False)}
+
+
+def signature_name(white_types, black_types):
+    return "".join(TYPE_LETTERS[t] for t in white_types) + "v" + "".join(TYPE_LETTERS[t] for t in black_types)
+
+
+def parse_signature(name):
+    white, _, black = name.upper().partition("V")
+    try:
+        return sort_types(LETTER_TYPES[letter] for letter in white), sort_types(LETTER_TYPES[letter] for letter in black)
+    except KeyError:
+        raise ValueError(f"Invalid ending: {name}") from None
+
+
+def sort_types(types):
+    return sorted(types, key=SIDE_ORDER.index)
+
+
+def _material_key(types):
+    return len(types), [-SIDE_ORDER.index(t) for t in types]
+
+
+def is_flipped(white_types, black_types):
+    # Each ending is stored once, with the stronger side as white; the other
+    # colouring is probed by mirroring the board and swapping the colours.
+    return _material_key(black_types) > _material_key(white_types)
+
+
+class EndgameTable:
+    def __init__(self, white_types, black_types, values):
+        self.white_types = white_types
+        self.black_types = black_types
+        self.codes = [t for t in white_types] + [6 + t for t in black_types]
+        self.layout = LAYOUTS[PAWN in white_types or PAWN in black_types]
+        self.size = len(self.layout.region) * 64 ** (len(self.codes) - 1) * 2
+        self.values = values
+
+    def value(self, squares, side):
+        return self.values[self.layout.index(squares, side)]
+
+
+def table_size(white_types, black_types):
+    layout = LAYOUTS[PAWN in white_types or PAWN in black_types]
+    return len(layout.region) * 64 ** (len(white_types) + len(black_types) - 1) * 2
+
+
+def position_material(pos):
+    white_types, black_types, squares_by_code = [], [], {}
+    for code, pieces in enumerate(pos.bitboards):
+        while pieces:
+            bit = pieces & -pieces
+            pieces ^= bit
+            squares_by_code.setdefault(code, []).append(bit.bit_length() - 1)
+            (white_types if code < 6 else black_types).append(CODE_TYPE[code])
+    return sort_types(white_types), sort_types(black_types), squares_by_code
+
+
+def distance_score(value):
+    if value == 0:
+        return 0
+    distance = value - 1
+    return TB_WIN_SCORE - distance if distance % 2 else distance - TB_WIN_SCORE
+
+
+class Tablebase:
+    def __init__(self, directory=DEFAULT_DIRECTORY):
+        self.directory = directory
+        self.tables = {}
+        self.files = []
+        self.max_pieces = 0
+        if os.path.isdir(directory):
+            for filename in sorted(os.listdir(directory)):
+                if filename.endswith(TABLE_SUFFIX):
+                    self._open(filename[:-len(TABLE_SUFFIX)])
+
+    def _open(self, name):
+        white_types, black_types = parse_signature(name)
+        path = os.path.join(self.directory, name + TABLE_SUFFIX)
+        f = open(path, "rb")
+        if os.fstat(f.fileno()).st_size != len(TABLE_MAGIC) + table_size(white_types, black_types):
+            f.close()
+            return None
+        data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if data[:len(TABLE_MAGIC)] != TABLE_MAGIC:
+            data.close()
+            f.close()
+            return None
+        self.files.append((f, data))
+        table = EndgameTable(white_types, black_types, memoryview(data)[len(TABLE_MAGIC):])
+        self.tables[name] = table
+        self.max_pieces = max(self.max_pieces, len(table.codes))
+        return table
+
+    def table(self, white_types, black_types):
+        return self.tables.get(signature_name(white_types, black_types))
+
+    def probe(self, pos, player):
+        # Returns the stored byte for the side to move, or None when the
+        # ending has no table.
+        white_types, black_types, squares_by_code = position_material(pos)
+        if not white_types or not black_types:
+            # A side with no pieces can neither move nor be mated.
+            return 0
+        side = 0 if player == "w" else 1
+        if is_flipped(white_types, black_types):
+            white_types, black_types = black_types, white_types
+            squares_by_code = {(code + 6) % 12: [FLIP_COLORS[sq] for sq in squares]
+                               for code, squares in squares_by_code.items()}
+            side = 1 - side
+        table = self.table(white_types, black_types)
+        if table is None:
+            return None
+        squares = []
+        seen = {}
+        for code in table.codes:
+            squares.append(squares_by_code[code][seen.get(code, 0)])
+            seen[code] = seen.get(code, 0) + 1
+        return table.value(squares, side)
+
+    def best_move(self, pos, player):
+        # Picks the fastest win, any drawing move, or the slowest loss, and
+        # returns it with its score for the side to move. None if any reply
+        # cannot be probed.
+        opponent = "b" if player == "w" else "w"
+        best = None
+        for move in bitboard.generate_moves(pos, player):
+            pos.make_move(move)
+            value = self.probe(pos, opponent)
+            pos.unmake_move()
+            if value is None:
+                return None
+            score = -distance_score(value)
+            if best is None or score > best[0]:
+                best = (score, move)
+        return best
+
+    def close(self):
+        self.tables = {}
+        for f, data in self.files:
+            data.close()
+            f.close()
+        self.files = []
+
+
+def load_tablebases(directory=DEFAULT_DIRECTORY):
+    tablebase = Tablebase(directory)
+    if not tablebase.tables:
+        return None
+    return tablebase
+
+
+class TablebaseGenerator(Tablebase):
+    def __init__(self, directory=DEFAULT_DIRECTORY, verbose=True):
+        os.makedirs(directory, exist_ok=True)
+        super().__init__(directory)
+        self.verbose = verbose
+
+    def table(self, white_types, black_types):
+        name = signature_name(white_types, black_types)
+        if name not in self.tables:
+            self.generate(name)
+        return self.tables[name]
+
+    def generate(self, name):
+        white_types, black_types = parse_signature(name)
+        if is_flipped(white_types, black_types):
+            white_types, black_types = black_types, white_types
+            name = signature_name(white_types, black_types)
+        if name in self.tables:
+            return self.tables[name]
+        if len(white_types) + len(black_types) > MAX_PIECES:
+            raise ValueError(f"Endings with more than {MAX_PIECES} pieces are not supported: {name}")
+        if not white_types or not black_types:
+            raise ValueError(f"Both sides need a piece: {name}")
+
+        start_time = time.perf_counter()
+        table = EndgameTable(white_types, black_types, None)
+        values = self._solve(table)
+        path = os.path.join(self.directory, name + TABLE_SUFFIX)
+        with open(path + ".tmp", "wb") as f:
+            f.write(TABLE_MAGIC)
+            f.write(values)
+        os.replace(path + ".tmp", path)
+        table = self._open(name)
+        if self.verbose:
+            longest = max(values) - 1 if max(values) else 0
+            print(f"{name}: {table.size} positions, longest mate {longest} plies, "
+                  f"{time.perf_counter() - start_time:.1f}s")
+        return table
+
+    def _solve(self, table):
+        codes = table.codes
+        layout = table.layout
+        count = len(codes)
+        size = table.size
+        players = ("w", "b")
+
+        state = array("b", [INVALID]) * size
+        successors = array("i", [0]) * size
+        win_at = array("B", [255]) * size
+        loss_at = array("B", [0]) * size
+        blocked = bytearray(size)
+        parents = array("i")
+        children = array("i")
+        # Index step for moving piece p by one square; the anchor (piece 0)
+        # may change the symmetry transform, so it is re-indexed instead.
+        weights = [64 ** (count - 1 - p) * 2 for p in range(count)]
+
+        for anchor_index, anchor in enumerate(layout.region):
+            for rest in itertools.product(range(64), repeat=count - 1):
+                squares = (anchor,) + rest
+                if len(set(squares)) < count:
+                    continue
+                if any(CODE_TYPE[code] == PAWN and sq // 8 in (0, 7) for code, sq in zip(codes, squares)):
+                    continue
+                pos = Position()
+                for code, sq in zip(codes, squares):
+                    pos.put(sq, code)
+                in_check = (bitboard.is_in_check(pos, "w"), bitboard.is_in_check(pos, "b"))
+                base = anchor_index
+                for sq in rest:
+                    base = base * 64 + sq
+                base *= 2
+
+                piece_at = {sq: p for p, sq in enumerate(squares)}
+
+                for side in (0, 1):
+                    if in_check[1 - side]:
+                        continue
+                    index = base + side
+                    moves = bitboard.generate_moves(pos, players[side])
+                    if not moves:
+                        state[index] = 0 if in_check[side] else DRAW
+                        continue
+                    state[index] = UNKNOWN
+                    for move in moves:
+                        from_sq, to_sq = move >> 6, move & 63
+                        piece = pos.squares[from_sq]
+                        if pos.squares[to_sq] == EMPTY and not (
+                                CODE_TYPE[piece] == PAWN and to_sq >> 3 == PROMOTION_ROW[CODE_COLOR[piece]]):
+                            moved = piece_at[from_sq]
+                            if moved:
+                                child = base + (to_sq - from_sq) * weights[moved] + 1 - side
+                            else:
+                                child_squares = list(squares)
+                                child_squares[0] = to_sq
+                                child = layout.index(child_squares, 1 - side)
+                            parents.append(index)
+                            children.append(child)
+                            successors[index] += 1
+                            continue
+                        # Captures and promotions leave this ending, so the
+                        # reply's value comes from an already solved table.
+                        pos.make_move(move)
+                        value = self.probe(pos, players[1 - side])
+                        pos.unmake_move()
+                        if value == 0:
+                            blocked[index] = 1
+                        elif (value - 1) % 2 == 0:
+                            win_at[index] = min(win_at[index], value)
+                        else:
+                            loss_at[index] = max(loss_at[index], value)
+
+        return self._propagate(state, successors, win_at, loss_at, blocked, parents, children)
+
+    def _propagate(self, state, successors, win_at, loss_at, blocked, parents, children):
+        # Retrograde pass over the successor graph, one ply per layer: a
+        # position is won at the first layer after any reply is lost, and
+        # lost once every reply has been shown to be won.
+        numpy_available()
+        distance = np.frombuffer(state, dtype=np.int8).astype(np.int16)
+        remaining = np.frombuffer(successors, dtype=np.int32).copy()
+        win_at = np.frombuffer(win_at, dtype=np.uint8).astype(np.int16)
+        loss_at = np.frombuffer(loss_at, dtype=np.uint8).astype(np.int16)
+        blocked = np.frombuffer(blocked, dtype=np.uint8).astype(bool)
+        parents = np.frombuffer(parents, dtype=np.int32)
+        children = np.frombuffer(children, dtype=np.int32)
+        size = len(distance)
+
+        # Positions whose replies all leave the ending are settled by the
+        # external values alone.
+        pending_loss = np.where((remaining == 0) & (distance == UNKNOWN) & ~blocked & (win_at == 255), loss_at, 0)
+        last_layer = max(int(win_at[win_at < 255].max(initial=0)), int(loss_at.max(initial=0)))
+        layer = 1
+        quiet_layers = 0
+        while layer <= MAX_DISTANCE and (quiet_layers < 2 or layer <= last_layer + 1):
+            unknown = distance == UNKNOWN
+            newly = np.zeros(size, dtype=bool)
+            previous = distance == layer - 1
+            if previous.any():
+                from_previous = parents[previous[children]]
+                if (layer - 1) % 2 == 0:
+                    newly[from_previous] = True
+                    newly &= unknown
+                else:
+                    settled = np.bincount(from_previous, minlength=size)
+                    remaining -= settled.astype(np.int32)
+                    ready = (settled > 0) & (remaining == 0) & unknown & ~blocked & (win_at == 255)
+                    pending_loss[ready] = np.maximum(loss_at[ready], layer)
+            if layer % 2:
+                newly |= unknown & (win_at == layer)
+            else:
+                newly |= unknown & (pending_loss == layer)
+            if newly.any():
+                distance[newly] = layer
+                quiet_layers = 0
+            else:
+                quiet_layers += 1
+            layer += 1
+
+        values = np.where(distance >= 0, distance + 1, 0).astype(np.uint8)
+        return values.tobytes()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate or probe endgame tablebases.")
+    parser.add_argument("--dir", default=DEFAULT_DIRECTORY, help="tablebase directory")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    generate = subparsers.add_parser("generate", help="build tables (and any smaller tables they need)")
+    generate.add_argument("endings", nargs="*", default=DEFAULT_ENDINGS, help="for example KQvK KRvK KQvKR")
+    probe = subparsers.add_parser("probe", help="show the tablebase value and best move for a position")
+    probe.add_argument("fen")
+    args = parser.parse_args(argv)
+
+    if args.command == "generate":
+        if not numpy_available():
+            print("numpy is required to generate tablebases")
+            return 1
+        generator = TablebaseGenerator(args.dir)
+        for name in args.endings:
+            generator.generate(name)
+        generator.close()
+        return 0
+
+    board, player = board_from_fen(args.fen)
+    pos = bitboard.from_board(board)
+    tablebase = Tablebase(args.dir)
+    value = tablebase.probe(pos, player)
+    if value is None:
+        print("not in the tablebase")
+        return 1
+    if value == 0:
+        print("draw")
+    else:
+        distance = value - 1
+        print(f"{'win' if distance % 2 else 'loss'} in {distance} plies")
+    best = tablebase.best_move(pos, player)
+    if best is not None:
+        print(f"best move {move_to_san(board, player, decode_move(best[1]))}")
+    tablebase.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
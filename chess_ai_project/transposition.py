@@ -0,0 +1,204 @@
+from multiprocessing import shared_memory
+
+EXACT, LOWER_BOUND, UPPER_BOUND = 0, 1, 2
+
+# Rough footprint of one stored entry: the list slot, the entry tuple and its
+# 64-bit key. Used only to turn a megabyte cap into a slot count.
+ENTRY_BYTES = 160
+
+DEFAULT_MEGABYTES = 16
+
+
+class TranspositionTable:
+    def __init__(self, max_megabytes=DEFAULT_MEGABYTES):
+        slots = max(1, int(max_megabytes * 1024 * 1024) // ENTRY_BYTES)
+        self.size = 1 << (slots.bit_length() - 1)
+        self.mask = self.size - 1
+        self.entries = [None] * self.size
+        self.generation = 0
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.overwrites = 0
+
+    def new_search(self):
+        self.generation += 1
+
+    def clear(self):
+        self.entries = [None] * self.size
+        self.generation = 0
+        self.reset_stats()
+
+    def reset_stats(self):
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.overwrites = 0
+
+    def probe(self, key):
+        entry = self.entries[key & self.mask]
+        if entry is not None and entry[0] == key:
+            self.hits += 1
+            return entry
+        self.misses += 1
+        return None
+
+    def store(self, key, depth, score, bound, move):
+        index = key & self.mask
+        entry = self.entries[index]
+        if entry is not None and entry[0] != key:
+            # Depth-preferred replacement; entries left over from earlier
+            # searches are always replaced.
+            if entry[5] == self.generation and entry[1] > depth:
+                return
+            self.overwrites += 1
+        self.entries[index] = (key, depth, score, bound, move, self.generation)
+        self.stores += 1
+
+    def used(self):
+        return sum(1 for entry in self.entries if entry is not None)
+
+    def stats(self):
+        probes = self.hits + self.misses
+        return {
+            "size": self.size,
+            "used": self.used(),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / probes if probes else 0.0,
+            "stores": self.stores,
+            "overwrites": self.overwrites,
+        }
+
+
+# Shared table layout: one 64-bit header word holding the search generation,
+# then two 64-bit words per slot, (key ^ data, data). A reader accepts a slot
+# only if the first word XOR the second gives back its key, so a slot torn by
+# a concurrent writer reads as a miss instead of as a wrong entry.
+SHARED_HEADER_WORDS = 1
+SHARED_ENTRY_WORDS = 2
+SHARED_ENTRY_BYTES = 8 * SHARED_ENTRY_WORDS
+
+SCORE_BITS, DEPTH_BITS, BOUND_BITS, MOVE_BITS, GENERATION_BITS = 32, 8, 2, 13, 8
+DEPTH_SHIFT = SCORE_BITS
+BOUND_SHIFT = DEPTH_SHIFT + DEPTH_BITS
+MOVE_SHIFT = BOUND_SHIFT + BOUND_BITS
+GENERATION_SHIFT = MOVE_SHIFT + MOVE_BITS
+SCORE_MASK = (1 << SCORE_BITS) - 1
+DEPTH_MASK = (1 << DEPTH_BITS) - 1
+BOUND_MASK = (1 << BOUND_BITS) - 1
+MOVE_MASK = (1 << MOVE_BITS) - 1
+GENERATION_MASK = (1 << GENERATION_BITS) - 1
+KEY_MASK = (1 << 64) - 1
+
+
+def _pack_entry(depth, score, bound, move, generation):
+    # Moves are stored off by one so that zero can mean "no move".
+    stored_move = 0 if move is None else move + 1
+    return ((int(score) & SCORE_MASK) | min(depth, DEPTH_MASK) << DEPTH_SHIFT | bound << BOUND_SHIFT
+            | stored_move << MOVE_SHIFT | (generation & GENERATION_MASK) << GENERATION_SHIFT)
+
+
+def _unpack_entry(key, data):
+    score = data & SCORE_MASK
+    if score >> (SCORE_BITS - 1):
+        score -= 1 << SCORE_BITS
+    stored_move = data >> MOVE_SHIFT & MOVE_MASK
+    return (key, data >> DEPTH_SHIFT & DEPTH_MASK, score, data >> BOUND_SHIFT & BOUND_MASK,
+            stored_move - 1 if stored_move else None, data >> GENERATION_SHIFT & GENERATION_MASK)
+
+
+class SharedTranspositionTable:
+    # Same interface as TranspositionTable, backed by a named shared memory
+    # block that any process on the host can attach to. Writes take no lock.
+    # Scores are stored as 32-bit integers.
+    def __init__(self, max_megabytes=DEFAULT_MEGABYTES, name=None):
+        if name is None:
+            slots = max(1, int(max_megabytes * 1024 * 1024) // SHARED_ENTRY_BYTES)
+            size = 1 << (slots.bit_length() - 1)
+            self.shm = shared_memory.SharedMemory(create=True, size=8 * (SHARED_HEADER_WORDS + SHARED_ENTRY_WORDS * size))
+            self.owner = True
+        else:
+            self.shm = shared_memory.SharedMemory(name=name)
+            size = (self.shm.size // 8 - SHARED_HEADER_WORDS) // SHARED_ENTRY_WORDS
+            size = 1 << (size.bit_length() - 1)
+            self.owner = False
+        self.name = self.shm.name
+        self.size = size
+        self.mask = size - 1
+        self.words = self.shm.buf.cast('Q')
+        self.generation = self.words[0]
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.overwrites = 0
+
+    def __reduce__(self):
+        return SharedTranspositionTable, (None, self.name)
+
+    def new_search(self):
+        # Worker processes only pick up the generation; advancing it is left
+        # to whoever coordinates the search, via next_generation().
+        self.generation = self.words[0]
+
+    def next_generation(self):
+        self.words[0] = (self.words[0] + 1) & GENERATION_MASK
+        self.generation = self.words[0]
+
+    def clear(self):
+        self.shm.buf[:] = bytes(len(self.shm.buf))
+        self.generation = 0
+        self.reset_stats()
+
+    def reset_stats(self):
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.overwrites = 0
+
+    def probe(self, key):
+        words = self.words
+        index = SHARED_HEADER_WORDS + SHARED_ENTRY_WORDS * (key & self.mask)
+        data = words[index + 1]
+        if data and words[index] ^ data == key:
+            self.hits += 1
+            return _unpack_entry(key, data)
+        self.misses += 1
+        return None
+
+    def store(self, key, depth, score, bound, move):
+        words = self.words
+        index = SHARED_HEADER_WORDS + SHARED_ENTRY_WORDS * (key & self.mask)
+        old_data = words[index + 1]
+        if old_data and words[index] ^ old_data != key:
+            if (old_data >> GENERATION_SHIFT & GENERATION_MASK) == self.generation and \
+                    (old_data >> DEPTH_SHIFT & DEPTH_MASK) > depth:
+                return
+            self.overwrites += 1
+        data = _pack_entry(depth, score, bound, move, self.generation)
+        words[index] = (key ^ data) & KEY_MASK
+        words[index + 1] = data
+        self.stores += 1
+
+    def used(self):
+        words = self.words
+        return sum(1 for index in range(SHARED_HEADER_WORDS + 1, SHARED_HEADER_WORDS + SHARED_ENTRY_WORDS * self.size,
+                                        SHARED_ENTRY_WORDS) if words[index])
+
+    def stats(self):
+        probes = self.hits + self.misses
+        return {
+            "size": self.size,
+            "used": self.used(),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / probes if probes else 0.0,
+            "stores": self.stores,
+            "overwrites": self.overwrites,
+        }
+
+    def close(self):
+        self.words.release()
+        self.shm.close()
+        if self.owner:
+            self.shm.unlink()
@@ -0,0 +1,230 @@
+import sys
+import threading
+from .board import board_state, board_from_fen, make_move, move_from_uci, move_to_uci, position_status, CHECKMATE
+from .engine import Engine, SearchLimits
+from .ai_configs import HEURISTICS
+from .minimax import SearchControl, MAX_SEARCH_DEPTH
+from .transposition import DEFAULT_MEGABYTES
+
+ENGINE_NAME = "Chess AI Project"
+
+DEFAULT_MOVES_TO_GO = 30
+MIN_MOVE_SECONDS = 0.05
+# Engine scores count a pawn as 10; UCI reports centipawns.
+CENTIPAWNS_PER_UNIT = 10
+
+
+def allocate_time(remaining_ms, increment_ms=0, moves_to_go=None):
+    budget = remaining_ms / (moves_to_go or DEFAULT_MOVES_TO_GO) + increment_ms * 0.75
+    return max(MIN_MOVE_SECONDS, min(budget, remaining_ms * 0.5) / 1000)
+
+
+def parse_go(tokens, player):
+    values = {}
+    index = 0
+    while index < len(tokens):
+        token = tokens[index]
+        if token in ("infinite", "ponder"):
+            values[token] = True
+            index += 1
+        elif index + 1 < len(tokens):
+            values[token] = tokens[index + 1]
+            index += 2
+        else:
+            index += 1
+
+    depth = int(values["depth"]) if "depth" in values else None
+    nodes = int(values["nodes"]) if "nodes" in values else None
+    time_limit = None
+    if "movetime" in values:
+        time_limit = int(values["movetime"]) / 1000
+    else:
+        remaining = values.get("wtime" if player == 'w' else "btime")
+        if remaining is not None:
+            increment = values.get("winc" if player == 'w' else "binc", 0)
+            moves_to_go = values.get("movestogo")
+            time_limit = allocate_time(int(remaining), int(increment), int(moves_to_go) if moves_to_go else None)
+    if depth is None and nodes is None and time_limit is None:
+        depth = MAX_SEARCH_DEPTH
+    return SearchLimits(depth, time_limit, nodes)
+
+
+def mate_distance(board, player, pv):
+    # Scores carry no distance to mate, so a mate is only reported when the
+    # principal variation plays into one: moves to mate, negative when the
+    # side to move is the one mated.
+    side = player
+    for move in pv:
+        board = make_move(board, move)
+        side = 'b' if side == 'w' else 'w'
+    if not pv or position_status(board, side) != CHECKMATE:
+        return None
+    moves = (len(pv) + 1) // 2
+    return -moves if side == player else moves
+
+
+class UCIAdapter:
+    def __init__(self, output=sys.stdout):
+        self.output = output
+        self.output_lock = threading.Lock()
+        self.heuristic = "combined"
+        self.use_symmetry = False
+        self.hash_megabytes = DEFAULT_MEGABYTES
+        self.engine = Engine(self.heuristic, self.use_symmetry, self.hash_megabytes)
+        self.board = [row[:] for row in board_state]
+        self.player = 'w'
+        self.search_thread = None
+        self.control = None
+        # While pondering (or searching infinitely) bestmove is held back
+        # until ponderhit or stop sets this.
+        self.release = None
+        self.pondering = False
+        self.ponder_time_limit = None
+
+    def send(self, line):
+        with self.output_lock:
+            self.output.write(line + "\n")
+            self.output.flush()
+
+    def handle(self, line):
+        tokens = line.split()
+        if not tokens:
+            return True
+        command, arguments = tokens[0], tokens[1:]
+        if command == "uci":
+            self.send(f"id name {ENGINE_NAME}")
+            self.send(f"id author {ENGINE_NAME} developers")
+            self.send(f"option name Hash type spin default {DEFAULT_MEGABYTES} min 1 max 1024")
+            self.send("option name Heuristic type combo default combined " +
+                      " ".join(f"var {name}" for name in sorted(HEURISTICS)))
+            self.send("option name Symmetry type check default false")
+            self.send("option name Ponder type check default false")
+            self.send("uciok")
+        elif command == "isready":
+            self.send("readyok")
+        elif command == "setoption":
+            self.stop_search()
+            self.set_option(arguments)
+        elif command == "ucinewgame":
+            self.stop_search()
+            self.engine.new_game()
+        elif command == "position":
+            self.stop_search()
+            self.set_position(arguments)
+        elif command == "go":
+            self.stop_search()
+            self.start_search(parse_go(arguments, self.player), "ponder" in arguments, "infinite" in arguments)
+        elif command == "ponderhit":
+            self.ponder_hit()
+        elif command == "stop":
+            self.stop_search()
+        elif command == "quit":
+            self.stop_search()
+            return False
+        return True
+
+    def set_option(self, arguments):
+        if "name" not in arguments:
+            return
+        if "value" in arguments:
+            name = " ".join(arguments[arguments.index("name") + 1:arguments.index("value")]).lower()
+            value = " ".join(arguments[arguments.index("value") + 1:])
+        else:
+            name, value = " ".join(arguments[arguments.index("name") + 1:]).lower(), ""
+        if name == "hash" and value.isdigit():
+            self.hash_megabytes = int(value)
+        elif name == "heuristic" and value in HEURISTICS:
+            self.heuristic = value
+        elif name == "symmetry":
+            self.use_symmetry = value.lower() == "true"
+        else:
+            return
+        self.engine = Engine(self.heuristic, self.use_symmetry, self.hash_megabytes)
+
+    def set_position(self, arguments):
+        if not arguments:
+            return
+        if arguments[0] == "startpos":
+            board, player = [row[:] for row in board_state], 'w'
+            rest = arguments[1:]
+        elif arguments[0] == "fen":
+            end = arguments.index("moves") if "moves" in arguments else len(arguments)
+            try:
+                board, player = board_from_fen(" ".join(arguments[1:end]))
+            except (ValueError, IndexError) as error:
+                self.send(f"info string {error}")
+                return
+            rest = arguments[end:]
+        else:
+            return
+        if rest and rest[0] == "moves":
+            for text in rest[1:]:
+                try:
+                    move = move_from_uci(text)
+                except ValueError as error:
+                    self.send(f"info string {error}")
+                    return
+                board = make_move(board, move)
+                player = 'b' if player == 'w' else 'w'
+        self.board, self.player = board, player
+
+    def start_search(self, limits, ponder=False, infinite=False):
+        # A ponder search runs without a clock; ponderhit puts it on the
+        # time limit the go command asked for.
+        self.pondering = ponder
+        self.ponder_time_limit = limits.time_limit if ponder else None
+        self.control = SearchControl(None if ponder else limits.time_limit, limits.nodes)
+        self.release = threading.Event()
+        if not (ponder or infinite):
+            self.release.set()
+        self.search_thread = threading.Thread(target=self.run_search,
+                                              args=(self.board, self.player, limits, self.control, self.release),
+                                              daemon=True)
+        self.search_thread.start()
+
+    def run_search(self, board, player, limits, control, release):
+        def report(depth, score, move, control):
+            elapsed = control.elapsed()
+            nps = int(control.nodes / elapsed) if elapsed > 0 else 0
+            line = control.pv or ([move] if move else [])
+            pv = " pv " + " ".join(move_to_uci(pv_move) for pv_move in line) if line else ""
+            mate = mate_distance(board, player, line)
+            value = f"mate {mate}" if mate is not None else f"cp {int(score * CENTIPAWNS_PER_UNIT)}"
+            self.send(f"info depth {depth} score {value} nodes {control.nodes} nps {nps} "
+                      f"time {int(elapsed * 1000)}{pv}")
+
+        result = self.engine.search((board, player), limits, report, control)
+        release.wait()
+        ponder = f" ponder {move_to_uci(result.pv[1])}" if result.move and len(result.pv) > 1 else ""
+        self.send(f"bestmove {move_to_uci(result.move) if result.move else '0000'}{ponder}")
+
+    def ponder_hit(self):
+        # The opponent played the move being pondered: the search carries
+        # on as a normal one, timed from now.
+        if self.search_thread is None or not self.pondering:
+            return
+        self.pondering = False
+        self.control.set_time_limit(self.ponder_time_limit, from_now=True)
+        self.release.set()
+
+    def stop_search(self):
+        if self.search_thread is not None:
+            self.control.stop()
+            self.release.set()
+            self.search_thread.join()
+            self.search_thread = None
+            self.control = None
+            self.pondering = False
+
+
+def main():
+    adapter = UCIAdapter()
+    for line in sys.stdin:
+        if not adapter.handle(line.strip()):
+            break
+    adapter.stop_search()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
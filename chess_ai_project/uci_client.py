@@ -0,0 +1,79 @@
+import os
+import queue
+import subprocess
+import sys
+import threading
+import time
+
+# (command, reply prefix to wait for). Replies are checked in order, so the
+# script doubles as a smoke test for GUIs and tournament managers.
+SCRIPT = [
+    ("uci", "uciok"),
+    ("isready", "readyok"),
+    ("ucinewgame", None),
+    ("position startpos moves e2e4", None),
+    ("go depth 4", "bestmove"),
+    ("position startpos moves e2e4 e7e5 g1f3", None),
+    ("go movetime 500", "bestmove"),
+    ("position fen r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w", None),
+    ("go infinite", None),
+    ("isready", "readyok"),
+    ("stop", "bestmove"),
+    ("position startpos moves d2d4 d7d5", None),
+    ("go wtime 20000 btime 20000 winc 100 binc 100", "bestmove"),
+    ("position startpos moves d2d4 d7d5 c2c4", None),
+    ("go ponder wtime 20000 btime 20000", None),
+    ("isready", "readyok"),
+    ("ponderhit", "bestmove"),
+    ("quit", None),
+]
+
+REPLY_TIMEOUT = 30.0
+
+
+def read_lines(stream, lines):
+    for line in stream:
+        lines.put(line.rstrip("\n"))
+    lines.put(None)
+
+
+def run_script(script=SCRIPT, command=None):
+    if command is None:
+        command = [sys.executable, "-m", "chess_ai_project.uci"]
+        cwd = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    else:
+        cwd = None
+    process = subprocess.Popen(command, stdin=subprocess.PIPE, stdout=subprocess.PIPE, text=True, bufsize=1, cwd=cwd)
+    lines = queue.Queue()
+    threading.Thread(target=read_lines, args=(process.stdout, lines), daemon=True).start()
+
+    failures = 0
+    for command_line, expected in script:
+        print(f">> {command_line}")
+        sent_at = time.perf_counter()
+        process.stdin.write(command_line + "\n")
+        process.stdin.flush()
+        if expected is None:
+            continue
+        while True:
+            try:
+                line = lines.get(timeout=REPLY_TIMEOUT)
+            except queue.Empty:
+                line = None
+            if line is None:
+                print(f"!! no '{expected}' reply to '{command_line}'")
+                failures += 1
+                break
+            print(f"<< {line}")
+            if line.startswith(expected):
+                print(f"   answered in {(time.perf_counter() - sent_at) * 1000:.1f} ms")
+                break
+
+    process.stdin.close()
+    process.wait(timeout=REPLY_TIMEOUT)
+    print(f"{failures} failed")
+    return failures
+
+
+if __name__ == "__main__":
+    sys.exit(1 if run_script() else 0)
@@ -0,0 +1,58 @@
+import random
+import unittest
+from chess_ai_project import batch_eval, bitboard
+from chess_ai_project.bitboard import from_board
+from chess_ai_project.board import board_from_fen
+from chess_ai_project.minimax import (evaluate_position_material, evaluate_position_pst,
+                                      evaluate_position_combined, node_statuses, _terminal_bonus)
+
+EVALUATORS = [evaluate_position_material, evaluate_position_pst, evaluate_position_combined]
+START = "rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w"
+# White to move with pawns on the seventh rank, so children include promotions.
+PROMOTIONS = "3qk3/PP3P2/8/8/8/8/5ppp/4K3 w"
+
+
+def random_positions(count, seed):
+    rng = random.Random(seed)
+    board, player = board_from_fen(START)
+    pos = from_board(board)
+    positions = []
+    while len(positions) < count:
+        moves = bitboard.generate_moves(pos, player)
+        if not moves or len(pos.history) > 60:
+            pos, player = from_board(board), 'w'
+            continue
+        pos.make_move(rng.choice(moves))
+        player = 'b' if player == 'w' else 'w'
+        positions.append((from_board(bitboard.to_board(pos)), player))
+    return positions
+
+
+@unittest.skipUnless(batch_eval.available(), "numpy is not installed")
+class BatchEvaluationTest(unittest.TestCase):
+    def test_matches_scalar_evaluators(self):
+        positions = random_positions(200, seed=7)
+        codes = batch_eval.encode_positions([pos for pos, _ in positions])
+        for evaluator in EVALUATORS:
+            for player in ('w', 'b'):
+                bonuses = [_terminal_bonus(node_statuses(pos, player)) for pos, _ in positions]
+                scores = batch_eval.evaluate_batch(codes, player, evaluator, bonuses)
+                expected = [evaluator(pos, player) for pos, _ in positions]
+                self.assertEqual(scores.tolist(), expected)
+
+    def test_children_match_made_moves(self):
+        for fen in (START, PROMOTIONS):
+            board, player = board_from_fen(fen)
+            pos = from_board(board)
+            moves = bitboard.generate_moves(pos, player)
+            codes = batch_eval.encode_children(pos, moves)
+            scores = batch_eval.evaluate_batch(codes, player, evaluate_position_combined)
+            for move, row, score in zip(moves, codes.tolist(), scores.tolist()):
+                pos.make_move(move)
+                self.assertEqual(row, pos.squares)
+                self.assertEqual(score, evaluate_position_combined.balance(pos, player))
+                pos.unmake_move()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,33 @@
+import unittest
+from chess_ai_project.engine import Engine, SearchLimits
+
+# Positions where a table left over from a search for the other side
+# changed the result before the engine guarded against it.
+SIDE_SWITCH_POSITIONS = [
+    "r1bqkbnr/pppp1ppp/2n5/4p3/4P3/5N2/PPPP1PPP/RNBQKB1R",
+    "4k3/5p2/8/8/8/8/5P2/4K3",
+]
+
+
+class EngineTest(unittest.TestCase):
+    def test_search_after_other_side_matches_fresh_engine(self):
+        limits = SearchLimits(depth=4)
+        for placement in SIDE_SWITCH_POSITIONS:
+            with self.subTest(position=placement):
+                engine = Engine()
+                engine.search(placement + " w", limits)
+                reused = engine.search(placement + " b", limits)
+                fresh = Engine().search(placement + " b", limits)
+                self.assertEqual(reused.move, fresh.move)
+                self.assertEqual(reused.score, fresh.score)
+
+    def test_table_is_kept_for_the_same_side(self):
+        engine = Engine()
+        engine.search(SIDE_SWITCH_POSITIONS[0] + " w", SearchLimits(depth=3))
+        used = engine.tt.used()
+        engine.search(SIDE_SWITCH_POSITIONS[0] + " w", SearchLimits(depth=2))
+        self.assertGreaterEqual(engine.tt.used(), used)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,24 @@
+import unittest
+from chess_ai_project.board import board_from_fen
+from chess_ai_project.perft import REFERENCE_POSITIONS, count_nodes
+
+MAX_DEPTH = 3
+
+
+class PerftTest(unittest.TestCase):
+    def check_reference_counts(self, board_api):
+        for name, fen, expected_counts in REFERENCE_POSITIONS:
+            board, player = board_from_fen(fen)
+            for depth in range(1, MAX_DEPTH + 1):
+                with self.subTest(position=name, depth=depth):
+                    self.assertEqual(count_nodes(board, player, depth, board_api), expected_counts[depth])
+
+    def test_bitboard_counts(self):
+        self.check_reference_counts(board_api=False)
+
+    def test_board_counts(self):
+        self.check_reference_counts(board_api=True)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,55 @@
+import random
+import unittest
+from chess_ai_project import bitboard
+from chess_ai_project.bitboard import from_board, to_board
+from chess_ai_project.board import board_from_fen
+
+START = "rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w"
+# Pawns one step from promoting on both sides.
+PROMOTIONS = "n1n5/PPPk4/8/8/8/8/4Kppp/5N1N b"
+STEPS = 400
+
+
+class IncrementalStateTest(unittest.TestCase):
+    def assert_matches_rebuild(self, pos):
+        rebuilt = from_board(to_board(pos))
+        self.assertEqual(pos.key, rebuilt.key)
+        self.assertEqual(pos.mirror_key, rebuilt.mirror_key)
+        self.assertEqual(pos.material, rebuilt.material)
+        self.assertEqual(pos.pst, rebuilt.pst)
+        self.assertEqual(pos.bitboards, rebuilt.bitboards)
+        self.assertEqual(pos.occupancy, rebuilt.occupancy)
+        self.assertEqual(pos.occupied, rebuilt.occupied)
+
+    def play_random_sequence(self, fen, seed):
+        # Mostly moves forward, with unmakes mixed in, so both directions are
+        # checked against a position built from scratch after every step.
+        rng = random.Random(seed)
+        board, player = board_from_fen(fen)
+        pos = from_board(board)
+        players = [player]
+        for _ in range(STEPS):
+            moves = bitboard.generate_moves(pos, players[-1])
+            if pos.history and (not moves or rng.random() < 0.3):
+                pos.unmake_move()
+                players.pop()
+            elif moves:
+                pos.make_move(rng.choice(moves))
+                players.append('b' if players[-1] == 'w' else 'w')
+            else:
+                break
+            self.assert_matches_rebuild(pos)
+        while pos.history:
+            pos.unmake_move()
+        self.assertEqual(pos.squares, from_board(board).squares)
+        self.assert_matches_rebuild(pos)
+
+    def test_random_make_unmake_matches_rebuild(self):
+        for seed in range(5):
+            for fen in (START, PROMOTIONS):
+                with self.subTest(fen=fen, seed=seed):
+                    self.play_random_sequence(fen, seed)
+
+
+if __name__ == "__main__":
+    unittest.main()
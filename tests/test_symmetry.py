@@ -0,0 +1,37 @@
+import unittest
+from chess_ai_project import bitboard
+from chess_ai_project.bitboard import from_board, decode_move
+from chess_ai_project.board import board_from_fen, generate_moves, move_from_uci
+from chess_ai_project.symmetry_reducer import reduce_symmetry, reduce_encoded_symmetry
+
+AFTER_E4 = "rnbqkbnr/pppppppp/8/8/4P3/8/PPPP1PPP/RNBQKBNR b"
+# A king is never on its own mirror square, so only a position without
+# kings can be its own mirror image.
+MIRRORED = "8/8/8/8/8/8/PPPPPPPP/R6R w"
+
+
+class SymmetryReductionTest(unittest.TestCase):
+    def test_asymmetric_position_keeps_every_move(self):
+        board, player = board_from_fen(AFTER_E4)
+        moves = generate_moves(board, player)
+        self.assertEqual(reduce_symmetry(moves, board), moves)
+
+        pos = from_board(board)
+        encoded = bitboard.generate_moves(pos, player)
+        reduced = [decode_move(move) for move in reduce_encoded_symmetry(encoded, pos)]
+        self.assertEqual(len(reduced), len(encoded))
+        self.assertIn(move_from_uci("b8c6"), reduced)
+        self.assertIn(move_from_uci("g8f6"), reduced)
+
+    def test_symmetric_position_drops_mirrored_moves(self):
+        board, player = board_from_fen(MIRRORED)
+        moves = generate_moves(board, player)
+        self.assertEqual(len(reduce_symmetry(moves, board)), len(moves) // 2)
+
+        pos = from_board(board)
+        encoded = bitboard.generate_moves(pos, player)
+        self.assertEqual(len(reduce_encoded_symmetry(encoded, pos)), len(encoded) // 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
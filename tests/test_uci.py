@@ -0,0 +1,81 @@
+import threading
+import unittest
+from chess_ai_project.uci import UCIAdapter, mate_distance
+from chess_ai_project.board import board_from_fen, move_from_uci
+
+# White mates with Ra8.
+MATE_IN_ONE = "6k1/5ppp/8/8/8/8/8/R5K1 w"
+# White wins a queen with Rxd1, leaving a rook up.
+WINS_QUEEN = "k7/8/8/8/8/8/8/K2q3R w"
+REPLY_TIMEOUT = 30.0
+
+
+class Output:
+    def __init__(self):
+        self.lines = []
+        self.changed = threading.Condition()
+
+    def write(self, text):
+        with self.changed:
+            self.lines.extend(line for line in text.splitlines() if line)
+            self.changed.notify_all()
+
+    def flush(self):
+        pass
+
+    def wait_for(self, prefix):
+        with self.changed:
+            found = self.changed.wait_for(lambda: any(line.startswith(prefix) for line in self.lines),
+                                          REPLY_TIMEOUT)
+        if not found:
+            raise AssertionError(f"no '{prefix}' line in {self.lines}")
+        return next(line for line in self.lines if line.startswith(prefix))
+
+
+class UCITest(unittest.TestCase):
+    def setUp(self):
+        self.output = Output()
+        self.adapter = UCIAdapter(self.output)
+
+    def tearDown(self):
+        self.adapter.handle("quit")
+
+    def test_ponder_holds_bestmove_until_ponderhit(self):
+        self.adapter.handle("position startpos moves e2e4")
+        self.adapter.handle("go ponder depth 2")
+        self.output.wait_for("info depth 2")
+        self.adapter.search_thread.join(0.2)
+        self.assertFalse(any(line.startswith("bestmove") for line in self.output.lines))
+        self.adapter.handle("ponderhit")
+        self.assertRegex(self.output.wait_for("bestmove"), r"^bestmove \w{4}")
+
+    def test_stop_while_pondering_sends_bestmove(self):
+        self.adapter.handle("position startpos")
+        self.adapter.handle("go ponder wtime 60000 btime 60000")
+        self.adapter.handle("stop")
+        self.output.wait_for("bestmove")
+
+    def test_mate_is_reported_as_score_mate(self):
+        self.adapter.handle(f"position fen {MATE_IN_ONE}")
+        self.adapter.handle("go depth 2")
+        self.assertEqual(self.output.wait_for("bestmove").split()[:2], ["bestmove", "a1a8"])
+        self.assertIn("score mate 1", self.output.wait_for("info depth 2"))
+
+    def test_score_is_reported_in_centipawns(self):
+        self.adapter.handle("setoption name Heuristic value material")
+        self.adapter.handle(f"position fen {WINS_QUEEN}")
+        self.adapter.handle("go depth 1")
+        self.assertEqual(self.output.wait_for("bestmove").split()[:2], ["bestmove", "h1d1"])
+        self.assertIn("score cp 500 ", self.output.wait_for("info depth 1"))
+
+    def test_mate_distance(self):
+        board, player = board_from_fen(MATE_IN_ONE)
+        self.assertEqual(mate_distance(board, player, [move_from_uci("a1a8")]), 1)
+        self.assertIsNone(mate_distance(board, player, [move_from_uci("a1a7")]))
+        board, player = board_from_fen("6k1/5ppp/8/8/8/8/8/R5K1 b")
+        self.assertEqual(mate_distance(board, player, [move_from_uci("g8h8"), move_from_uci("a1a8")]), -1)
+        self.assertIsNone(mate_distance(board, player, []))
+
+
+if __name__ == "__main__":
+    unittest.main()